@@ -0,0 +1,82 @@
+"""
+Compares the ratio greedy fill and linear relaxation bound computed by
+partitioning around the critical item with the original full sort, on
+instances with 10^4 to 10^7 items. Run from the repository root with:
+
+    python -m benchmarks.break_item [--sizes 4 5 6 7] [--kind uncorrelated]
+
+The 'sort' path is the original one, which sorts every item by its
+value-weight ratio and scans the order, while 'partition' is
+ratio_greedy_solver() and linear_relaxation_bound() themselves. Both must
+take the same items and give the same bound.
+"""
+from knapsack import *
+from knapsack.generators import BulkKnapsackGenerator, KINDS
+from knapsack.knapsack import _ratio_order
+from knapsack.solvers import ratio_greedy_solver
+from knapsack.solvers.preprocess import linear_relaxation_bound
+import argparse
+import time
+
+
+def sorted_greedy_and_bound(instance: KnapsackArrayInstance) -> tuple:
+    weights = instance.weights
+    values = instance.values
+    order: list = _ratio_order(weights, values)
+
+    taken: set = set()
+    residual: int = instance.capacity
+    for idx in order:
+        if residual <= 0:
+            break
+        if weights[idx] <= residual:
+            taken.add(idx)
+            residual -= weights[idx]
+
+    value_bound = 0
+    residual = instance.capacity
+    for idx in order:
+        if values[idx] <= 0:
+            continue
+        if weights[idx] > residual:
+            value_bound += residual * values[idx] / weights[idx]
+            break
+        value_bound += values[idx]
+        residual -= weights[idx]
+
+    return taken, value_bound
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 5, 6, 7], help='powers of ten')
+    parser.add_argument('--kind', choices=KINDS, default='uncorrelated')
+    parser.add_argument('--coefficient-range', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{"items":>10} {"sort (s)":>10} {"partition (s)":>14} {"speedup":>9}')
+
+    for exponent in args.sizes:
+        num_items: int = 10 ** exponent
+        generator: BulkKnapsackGenerator = BulkKnapsackGenerator(
+            num_items, args.kind, args.coefficient_range, seed=args.seed
+        )
+        instance: KnapsackArrayInstance = generator.generate()
+
+        start: float = time.perf_counter()
+        taken, value_bound = sorted_greedy_and_bound(instance)
+        sort_time: float = time.perf_counter() - start
+
+        start = time.perf_counter()
+        allocation: KnapsackAllocation = ratio_greedy_solver(instance)
+        partition_bound: float = linear_relaxation_bound(instance)
+        partition_time: float = time.perf_counter() - start
+
+        assert set(allocation.knapsack) == taken
+        assert abs(partition_bound - value_bound) <= 1e-9 * max(1.0, abs(value_bound))
+        print(f'{num_items:>10} {sort_time:>10.4f} {partition_time:>14.4f} {sort_time / partition_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares the pure Python and NumPy dynamic programming engines across
+capacities from 10^3 to 10^7. Run from the repository root with:
+
+    python -m benchmarks.dyn_prog_engines [--items N] [--max-python-cells C]
+
+The Python engine is skipped once num_items * capacity exceeds the cell
+limit, since it would take minutes at the larger capacities. Both engines
+fill the capacity table without preprocessing, so that the reduction and
+the choice of axis don't change the work being compared.
+"""
+from knapsack import *
+from knapsack.solvers import dynamic_programming_solver
+import argparse
+import random
+import time
+
+
+def time_solver(instance: KnapsackInstance, engine: str) -> tuple:
+    start: float = time.perf_counter()
+    allocation: KnapsackAllocation = dynamic_programming_solver(
+        instance, engine=engine, axis='capacity', preprocess=False
+    )
+    return time.perf_counter() - start, allocation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=20)
+    parser.add_argument('--max-python-cells', type=int, default=5 * 10 ** 7)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # NumPy is imported on first use, which the first timing shouldn't pay for.
+    time_solver(KnapsackInstance(1, [KnapsackItem(1, 1)]), 'numpy')
+    print(f'{"capacity":>10} {"python (s)":>12} {"numpy (s)":>12} {"speedup":>9}')
+
+    for exponent in range(3, 8):
+        capacity: int = 10 ** exponent
+        generator: KnapsackGenerator = KnapsackGenerator(
+            min_capacity=capacity,
+            max_capacity=capacity,
+            min_num_items=args.items,
+            max_num_items=args.items,
+            min_weight=1,
+            max_weight=capacity // 2,
+            min_value=1,
+            max_value=1000
+        )
+        instance: KnapsackInstance = generator.generate()
+
+        numpy_time, numpy_allocation = time_solver(instance, 'numpy')
+        if args.items * capacity > args.max_python_cells:
+            print(f'{capacity:>10} {"skipped":>12} {numpy_time:>12.4f} {"-":>9}')
+            continue
+
+        python_time, python_allocation = time_solver(instance, 'python')
+        assert python_allocation == numpy_allocation
+        print(f'{capacity:>10} {python_time:>12.4f} {numpy_time:>12.4f} {python_time / numpy_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
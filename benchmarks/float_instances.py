@@ -0,0 +1,124 @@
+"""
+Checks the solvers on small instances with float weights or values against
+the optimum found by enumerating every allocation. Run from the repository
+root with:
+
+    python -m benchmarks.float_instances [--instances 50] [--items 8] [--seed 0]
+
+Every allocation must fit in the capacity and be worth the value reported,
+and exact solvers must find the optimum. A solver may reject an instance
+it does not support with a ValueError. The script exits with status 1 if
+any check fails.
+"""
+from knapsack import *
+from knapsack.solvers import *
+import argparse
+import functools
+import itertools
+import random
+import sys
+
+# The solver, and whether it must find the optimum.
+SOLVERS = {
+    'dynamic_programming': (dynamic_programming_solver, True),
+    'branch_and_bound': (branch_and_bound_solver, True),
+    'parallel_branch_and_bound': (functools.partial(parallel_branch_and_bound_solver, workers=2), True),
+    'auto': (auto_solver, True),
+    'genetic_algorithm (numpy)': (functools.partial(genetic_algorithm_solver, engine='numpy'), False),
+    'genetic_algorithm (python)': (functools.partial(genetic_algorithm_solver, engine='python'), False)
+}
+
+# Instances the solvers got wrong before.
+REGRESSIONS = (
+    KnapsackInstance(5, [KnapsackItem(2.5, 3), KnapsackItem(2.5, 3), KnapsackItem(1.5, 2)]),
+    KnapsackInstance(5, [KnapsackItem(2, 1.5), KnapsackItem(2, 1.5), KnapsackItem(1, 1.0)]),
+    KnapsackInstance(0.9, [KnapsackItem(0.7, 8), KnapsackItem(2.9, 31), KnapsackItem(1.4, 15), KnapsackItem(0.9, 10)]),
+    KnapsackInstance(6, [KnapsackItem(2.5, 1), KnapsackItem(3.5, 2), KnapsackItem(4.0, 3), KnapsackItem(1.5, 1)])
+)
+
+TOLERANCE: float = 1e-9
+
+
+def brute_force(instance: KnapsackInstance):
+    """
+    Returns the optimal value, by trying every allocation.
+    """
+    weights = instance.weights
+    values = instance.values
+    best = 0
+    for genes in itertools.product((0, 1), repeat=len(weights)):
+        if sum(w for w, gene in zip(weights, genes) if gene) <= instance.capacity:
+            best = max(best, sum(v for v, gene in zip(values, genes) if gene))
+    return best
+
+
+def random_instance(rng: random.Random, num_items: int) -> KnapsackInstance:
+    """
+    Draws float weights with integer or float values, or integer weights
+    with float values. Weights with one decimal place and integer values
+    tie the most, which is where float rounding changes decisions.
+    """
+    kind: int = rng.randrange(3)
+    items: list = []
+    for _ in range(num_items):
+        if kind == 0:
+            weight, value = round(rng.uniform(0.1, 5), 1), rng.randint(1, 50)
+        elif kind == 1:
+            weight = round(rng.uniform(0.5, 10), 2)
+            value = round(rng.uniform(0.5, 10), 2) if rng.random() < 0.5 else rng.randint(1, 10)
+        else:
+            weight, value = rng.randint(1, 10), round(rng.uniform(0.5, 10), 2)
+        items.append(KnapsackItem(weight, value))
+    return KnapsackInstance(round(sum(item.weight for item in items) / 2, 1 if kind == 0 else 2), items)
+
+
+def check(name: str, solver, exact: bool, instance: KnapsackInstance, optimum) -> str:
+    """
+    Returns a description of what is wrong with the solver's allocation for
+    the instance, or None if nothing is.
+    """
+    try:
+        allocation: KnapsackAllocation = solver(instance)
+    except ValueError:
+        # The solver does not take this kind of instance, e.g., dynamic
+        # programming with float weights and values, and says so.
+        return None
+    weight = sum(instance.weights[idx] for idx in allocation.knapsack)
+    value = sum(instance.values[idx] for idx in allocation.knapsack)
+    if weight > instance.capacity + TOLERANCE:
+        return f'{name}: {allocation} weighs {weight}, over the capacity {instance.capacity}'
+    if abs(value - allocation.value) > TOLERANCE:
+        return f'{name}: {allocation} is worth {value}, not {allocation.value}'
+    # Float sums depend on their order, so an allocation within TOLERANCE of
+    # the capacity may beat the optimum by a little.
+    if exact and value < optimum - TOLERANCE:
+        return f'{name}: {allocation} is worth {value}, not the optimum {optimum}'
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--instances', type=int, default=50)
+    parser.add_argument('--items', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng: random.Random = random.Random(args.seed)
+    random.seed(args.seed)
+    instances: list = list(REGRESSIONS) + [random_instance(rng, args.items) for _ in range(args.instances)]
+
+    failures: int = 0
+    for instance in instances:
+        optimum = brute_force(instance)
+        for name, (solver, exact) in SOLVERS.items():
+            problem: str = check(name, solver, exact, instance, optimum)
+            if problem is not None:
+                failures += 1
+                print(f'{problem} for {instance.to_tuple()}')
+
+    print(f'{len(instances)} instances, {len(SOLVERS)} solvers, {failures} failures')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Checks the (1 - epsilon) guarantee of the FPTAS against the exact optimum
+across instance classes, and reports its time, cells and memory for each
+epsilon. Run from the repository root with:
+
+    python -m benchmarks.fptas_guarantee [--items 50 200] [--epsilons 0.5 0.1 0.01]
+        [--instances 5] [--seed 0]
+
+The optimum comes from auto_solver(), and instances it cannot prove within
+the time limit are skipped. The script exits with status 1 if any ratio
+falls below 1 - epsilon.
+"""
+from knapsack import *
+from knapsack.generators import BulkKnapsackGenerator, KINDS
+from knapsack.solvers import fptas_solver, auto_solver
+import argparse
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--epsilons', type=float, nargs='+', default=[0.5, 0.1, 0.01])
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS))
+    parser.add_argument('--coefficient-range', type=int, default=10000)
+    parser.add_argument('--instances', type=int, default=5)
+    parser.add_argument('--time-limit', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    violations: int = 0
+    print(f'{"kind":>27} {"items":>6} {"epsilon":>8} {"worst ratio":>12} {"time (s)":>9} {"cells":>12} {"memory (KiB)":>13}')
+
+    for num_items in args.items:
+        for kind in args.kinds:
+            generator: BulkKnapsackGenerator = BulkKnapsackGenerator(
+                num_items, kind, args.coefficient_range, seed=args.seed + num_items
+            )
+            instances: list = []
+            optima: list = []
+            for instance in generator.generate_many(args.instances):
+                stats: dict = {}
+                allocation: KnapsackAllocation = auto_solver(instance, time_limit=args.time_limit, stats=stats)
+                if stats['optimal'] and allocation.value > 0:
+                    instances.append(instance)
+                    optima.append(allocation.value)
+
+            for epsilon in args.epsilons:
+                worst: float = 1.0
+                elapsed: float = 0.0
+                cells: int = 0
+                memory: int = 0
+                for instance, optimum in zip(instances, optima):
+                    stats: dict = {}
+                    start: float = time.perf_counter()
+                    allocation: KnapsackAllocation = fptas_solver(instance, epsilon, stats=stats)
+                    elapsed += time.perf_counter() - start
+                    cells = max(cells, stats['cells'])
+                    memory = max(memory, stats['memory'])
+                    worst = min(worst, allocation.value / optimum)
+
+                if worst < 1 - epsilon:
+                    violations += 1
+                mean: float = elapsed / len(instances) if instances else 0.0
+                print(f'{kind:>27} {num_items:>6} {epsilon:>8} {worst:>12.5f} {mean:>9.4f} {cells:>12} {memory / 1024:>13.1f}'
+                      + ('  VIOLATED' if worst < 1 - epsilon else ''))
+
+    print(f'{violations} guarantee violations')
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == '__main__':
+    main()
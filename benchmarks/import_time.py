@@ -0,0 +1,65 @@
+"""
+Measures the cold-start cost of importing a solver, now that the solvers
+are loaded lazily, against importing every solver as the package used to.
+Run from the repository root with:
+
+    python -m benchmarks.import_time [--repeats 10]
+
+Each statement runs in a fresh interpreter under python -X importtime, and
+the import time reported is the sum of the cumulative times of its top
+level imports, taking the best of the repeats. The last column says
+whether NumPy was imported along the way.
+"""
+import argparse
+import subprocess
+import sys
+
+STATEMENTS = (
+    'from knapsack.solvers import greedy_solver',
+    'from knapsack.solvers import ratio_greedy_solver',
+    'from knapsack.solvers import branch_and_bound_solver',
+    'from knapsack.solvers import dynamic_programming_solver',
+    'from knapsack.solvers import *'
+)
+
+
+def import_time(statement: str) -> tuple:
+    """
+    Returns the total import time in microseconds of the statement, and the
+    names of the modules it imported.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True
+    )
+
+    total: int = 0
+    modules: set = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        # Nested imports are indented, and already counted by their parent.
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f'{"statement":<56} {"import (ms)":>12} {"modules":>8} {"numpy":>6}')
+    for statement in STATEMENTS:
+        best: int = None
+        modules: set = set()
+        for _ in range(args.repeats):
+            total, modules = import_time(statement)
+            best = total if best is None else min(best, total)
+        print(f'{statement:<56} {best / 1000:>12.1f} {len(modules):>8} {"yes" if "numpy" in modules else "no":>6}')
+
+
+if __name__ == '__main__':
+    main()
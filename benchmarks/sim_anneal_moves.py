@@ -0,0 +1,93 @@
+"""
+Compares the moves per second of simulated annealing before and after
+moves were evaluated in place, on instances with 10^2 to 10^5 items. Run
+from the repository root with:
+
+    python -m benchmarks.sim_anneal_moves [--moves M]
+
+The 'copying' loop is the original one, which builds a new SAKnapsack with
+a copy of the allocation for every proposed move and calls np.exp, while
+'in place' is simulated_annealing_solver() itself.
+"""
+from knapsack import *
+from knapsack.solvers import simulated_annealing_solver
+from knapsack.solvers.sim_anneal import SAKnapsack, INITIAL_TEMPERATURE, COOLING_RATIO
+import numpy as np
+import argparse
+import random
+import time
+
+
+def copying_neighbour(current: SAKnapsack) -> SAKnapsack:
+    """
+    The original move, which copies the allocation and flips a random bit
+    of the copy.
+    """
+    allocation: list = current.allocation[:]
+    ridx: int = random.randint(0, len(allocation) - 1)
+    allocation[ridx] = int(not allocation[ridx])
+
+    pos_neg: int = 1 if allocation[ridx] else -1
+    value: int = abs(current.value) + pos_neg * current.instance.items[ridx].value
+    weight: int = current.weight + pos_neg * current.instance.items[ridx].weight
+    if weight > current.instance.capacity:
+        value = -value
+    return SAKnapsack(current.instance, allocation, value, weight)
+
+
+def copying_moves_per_second(instance: KnapsackInstance, moves: int) -> float:
+    current: SAKnapsack = SAKnapsack(instance, [0] * len(instance.items), 0, 0)
+    best: SAKnapsack = current
+    temperature: float = INITIAL_TEMPERATURE
+
+    start: float = time.perf_counter()
+    for _ in range(moves):
+        neighbour: SAKnapsack = copying_neighbour(current)
+        delta_value: int = neighbour.value - current.value
+        if delta_value >= 0:
+            current = neighbour
+            if current.value > best.value:
+                best = current
+        elif random.uniform(0, 1) < np.exp(delta_value / temperature):
+            current = neighbour
+        temperature *= COOLING_RATIO
+    return moves / (time.perf_counter() - start)
+
+
+def in_place_moves_per_second(instance: KnapsackInstance, moves: int) -> float:
+    stats: dict = {}
+    start: float = time.perf_counter()
+    simulated_annealing_solver(instance, max_iterations=moves, stats=stats)
+    return stats['iterations'] / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--moves', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    print(f'{"items":>8} {"copying (moves/s)":>18} {"in place (moves/s)":>19} {"speedup":>9}')
+
+    for exponent in range(2, 6):
+        num_items: int = 10 ** exponent
+        generator: KnapsackGenerator = KnapsackGenerator(
+            min_capacity=num_items * 25,
+            max_capacity=num_items * 25,
+            min_num_items=num_items,
+            max_num_items=num_items,
+            min_weight=1,
+            max_weight=100,
+            min_value=1,
+            max_value=100
+        )
+        instance: KnapsackInstance = generator.generate()
+
+        copying: float = copying_moves_per_second(instance, args.moves)
+        in_place: float = in_place_moves_per_second(instance, args.moves)
+        print(f'{num_items:>8} {copying:>18,.0f} {in_place:>19,.0f} {in_place / copying:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
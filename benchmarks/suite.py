@@ -0,0 +1,176 @@
+"""
+Runs every solver over a grid of item counts, capacities and instance
+classes, and writes one record per run as JSON or CSV. Run from the
+repository root with:
+
+    python -m benchmarks.suite [--items 100 1000] [--kinds uncorrelated ...]
+        [--capacity-ratios 0.5] [--solvers ...] [--repeats 3] [--seed 0]
+        [--time-limit T] [--output results.json]
+
+Each record holds the wall time (the median of the repeats is printed),
+the peak memory traced by tracemalloc in a separate run, since tracing
+slows the solvers down, the value, and the gap to the optimum found by
+dynamic programming. Instances are drawn with fixed seeds, so two runs of
+the same grid solve the same instances, and their outputs can be compared
+to catch performance regressions between versions.
+
+Every solver exported by knapsack.solvers is run. tracemalloc only sees
+the memory of this process, so the peak memory of solvers which run in a
+pool of worker processes leaves out the workers, and is marked with a *.
+"""
+from knapsack import *
+from knapsack.generators import BulkKnapsackGenerator, KINDS
+from knapsack.solvers import *
+import knapsack.solvers
+import argparse
+import random
+import inspect
+import platform
+import statistics
+import tracemalloc
+import json
+import csv
+import sys
+import time
+
+
+SOLVERS = {
+    name[:-len('_solver')]: getattr(knapsack.solvers, name)
+    for name in knapsack.solvers.__all__ if name.endswith('_solver')
+}
+# Solvers whose work, and memory, is in worker processes.
+WORKER_SOLVERS = ('parallel_simulated_annealing', 'parallel_branch_and_bound')
+FIELDS = (
+    'solver', 'kind', 'items', 'capacity_ratio', 'capacity', 'seed', 'repeat',
+    'time', 'peak_memory', 'value', 'optimum', 'gap', 'optimal'
+)
+
+
+def run_solver(solver, instance: KnapsackArrayInstance, time_limit: float) -> tuple:
+    """
+    Solves the instance once, and returns the wall time, the allocation and
+    the stats, which are None for solvers that do not record any.
+    """
+    parameters = inspect.signature(solver).parameters
+    options: dict = {}
+    if time_limit is not None and 'time_limit' in parameters:
+        options['time_limit'] = time_limit
+    stats: dict = {} if 'stats' in parameters else None
+    if stats is not None:
+        options['stats'] = stats
+
+    start: float = time.perf_counter()
+    allocation: KnapsackAllocation = solver(instance, **options)
+    return time.perf_counter() - start, allocation, stats
+
+
+def peak_memory(solver, instance: KnapsackArrayInstance, time_limit: float) -> int:
+    """
+    Returns the peak memory traced in this process while solving the
+    instance, which leaves out any worker processes.
+    """
+    tracemalloc.start()
+    try:
+        run_solver(solver, instance, time_limit)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def optimum(instance: KnapsackArrayInstance) -> int:
+    """
+    Returns the optimal value found by dynamic programming, or None if it
+    could not be proven within the time allowed.
+    """
+    stats: dict = {}
+    allocation: KnapsackAllocation = dynamic_programming_solver(instance, time_limit=60, stats=stats)
+    return allocation.value if stats['optimal'] else None
+
+
+def write_records(path: str, records: list, grid: dict):
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        return
+
+    with open(path, 'w') as file:
+        json.dump({
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'grid': grid,
+            'records': records
+        }, file, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS))
+    parser.add_argument('--capacity-ratios', type=float, nargs='+', default=[0.5])
+    parser.add_argument('--coefficient-range', type=int, default=1000)
+    parser.add_argument('--solvers', nargs='+', choices=tuple(SOLVERS), default=list(SOLVERS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=None)
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    records: list = []
+    print(f'{"solver":>28} {"kind":>27} {"items":>6} {"ratio":>5} {"time (s)":>9} {"peak (KiB)":>10}  {"gap":>8}')
+
+    for num_items in args.items:
+        for kind in args.kinds:
+            for ratio_idx, capacity_ratio in enumerate(args.capacity_ratios):
+                # Every cell of the grid has its own seed, so cells can be
+                # added or removed without changing the other instances.
+                seed: int = args.seed + 1000 * num_items + 10 * KINDS.index(kind) + ratio_idx
+                instance: KnapsackArrayInstance = BulkKnapsackGenerator(
+                    num_items, kind, args.coefficient_range, capacity_ratio, seed
+                ).generate()
+                best: int = optimum(instance)
+
+                for name in args.solvers:
+                    solver = SOLVERS[name]
+                    times: list = []
+                    for repeat in range(args.repeats):
+                        # The stochastic solvers draw from the global random
+                        # state, so each repeat is seeded too.
+                        random.seed(seed + repeat)
+                        elapsed, allocation, stats = run_solver(solver, instance, args.time_limit)
+                        times.append(elapsed)
+                        records.append({
+                            'solver': name,
+                            'kind': kind,
+                            'items': num_items,
+                            'capacity_ratio': capacity_ratio,
+                            'capacity': instance.capacity,
+                            'seed': seed,
+                            'repeat': repeat,
+                            'time': elapsed,
+                            'peak_memory': None,
+                            'value': allocation.value,
+                            'optimum': best,
+                            'gap': None if best is None else best - allocation.value,
+                            'optimal': None if stats is None else stats.get('optimal')
+                        })
+
+                    random.seed(seed)
+                    memory: int = peak_memory(solver, instance, args.time_limit)
+                    for record in records[-args.repeats:]:
+                        record['peak_memory'] = memory
+
+                    gap = records[-1]['gap']
+                    marker: str = '*' if name in WORKER_SOLVERS else ' '
+                    print(f'{name:>28} {kind:>27} {num_items:>6} {capacity_ratio:>5} '
+                          f'{statistics.median(times):>9.4f} {memory / 1024:>10.1f}{marker} {"-" if gap is None else gap:>8}')
+
+    if any(name in WORKER_SOLVERS for name in args.solvers):
+        print('* tracemalloc cannot see worker processes, so this is the memory of the parent alone')
+    write_records(args.output, records, vars(args))
+    print(f'Wrote {len(records)} records to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,2 @@
 from .knapsack import *
+from .formats import iter_instances, write_instances, read_binary
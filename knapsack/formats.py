@@ -0,0 +1,234 @@
+from .knapsack import KnapsackArrayInstance
+from collections.abc import Sequence
+from array import array
+import itertools
+import struct
+import mmap
+import sys
+
+# Readers and writers for knapsack instance files. There are two common
+# text formats for benchmark instances:
+#
+# Pisinger [1], where a file holds any number of instances, each of which
+# is a name line, followed by 'n', 'c', 'z' (the optimal value) and 'time'
+# lines, one 'index,value,weight,x' line per item (x marks the optimal
+# allocation), and a line of dashes:
+#
+#     knapPI_1_50_1000_1
+#     n 50
+#     c 995
+#     z 8373
+#     time 0.00
+#     1,94,485,0
+#     ...
+#     -----
+#
+# OR-Library style [2], where a file holds a single instance as the number
+# of items and the capacity, followed by one 'value weight' pair per item.
+#
+# The binary format stores many instances as raw little-endian 64-bit
+# integers, so it can be memory-mapped and read without any parsing:
+#
+#     header: b'KNAPSACK', version (uint32), count (uint32), index offset (int64)
+#     data:   the weights and then the values of each instance
+#     index:  (capacity, num_items, data offset) for each instance, as int64s
+#
+# The index comes last, so that instances can be written as they stream in.
+#
+# References:
+# [1] D. Pisinger, Where are the hard knapsack problems?, 2005.
+# [2] J. E. Beasley, OR-Library: distributing test problems by electronic mail, 1990.
+
+FORMATS = ('pisinger', 'orlib', 'binary')
+BINARY_MAGIC: bytes = b'KNAPSACK'
+BINARY_VERSION: int = 1
+BINARY_HEADER = struct.Struct('<8sIIq')
+BINARY_INDEX = struct.Struct('<qqq')
+
+
+def __number(token: str):
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def iter_pisinger(path: str):
+    """
+    Reads the instances in a Pisinger-style file one at a time.
+    """
+    with open(path) as file:
+        lines = (line.strip() for line in file)
+        for line in lines:
+            if not line or line.startswith('-'):
+                continue
+
+            # The name line is followed by 'key value' lines up to the items.
+            header: dict = {}
+            for line in lines:
+                key, _, value = line.partition(' ')
+                header[key] = value
+                if key == 'time':
+                    break
+
+            weights: list = []
+            values: list = []
+            for line in itertools.islice(lines, int(header['n'])):
+                _, value, weight, *_ = line.split(',')
+                values.append(__number(value))
+                weights.append(__number(weight))
+
+            yield KnapsackArrayInstance(__number(header['c']), weights, values)
+
+
+def write_pisinger(path: str, instances, optima: list = None, names: list = None):
+    """
+    Writes the instances to a Pisinger-style file. The optimal values are
+    written as zero unless they are passed, and no allocation is marked.
+    """
+    with open(path, 'w') as file:
+        for idx, instance in enumerate(instances):
+            name: str = names[idx] if names is not None else f'knapsack_{idx}'
+            optimum = optima[idx] if optima is not None else 0
+            file.write(f'{name}\nn {len(instance.weights)}\nc {instance.capacity}\nz {optimum}\ntime 0.00\n')
+            file.writelines(
+                f'{item + 1},{value},{weight},0\n'
+                for item, (weight, value) in enumerate(zip(instance.weights, instance.values))
+            )
+            file.write('-----\n\n')
+
+
+def read_orlib(path: str) -> KnapsackArrayInstance:
+    """
+    Reads an OR-Library style file of the number of items and the capacity,
+    followed by a value and a weight for each item.
+    """
+    with open(path) as file:
+        tokens: list = file.read().split()
+    num_items: int = int(tokens[0])
+    numbers: list = [__number(token) for token in tokens[2:2 + 2 * num_items]]
+    if len(numbers) < 2 * num_items:
+        raise ValueError(f'{path} holds fewer than {num_items} items')
+    return KnapsackArrayInstance(__number(tokens[1]), numbers[1::2], numbers[0::2])
+
+
+def write_orlib(path: str, instance):
+    with open(path, 'w') as file:
+        file.write(f'{len(instance.weights)} {instance.capacity}\n')
+        file.writelines(f'{value} {weight}\n' for weight, value in zip(instance.weights, instance.values))
+
+
+def __int64_bytes(sequence) -> bytes:
+    # Arrays and buffers of native 64-bit integers are written as they are.
+    if sys.byteorder == 'little' and isinstance(sequence, (array, memoryview)) \
+            and sequence.itemsize == 8 and getattr(sequence, 'format', getattr(sequence, 'typecode', '')) in ('q', 'l'):
+        return sequence.tobytes()
+
+    try:
+        data: array = array('q', sequence)
+    except (TypeError, OverflowError):
+        raise ValueError('the binary format only holds 64-bit integer weights and values') from None
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_binary(path: str, instances) -> int:
+    """
+    Writes the instances to a binary file, one at a time, so any iterable of
+    instances can be streamed to disk. Returns the number written.
+    """
+    index: list = []
+    with open(path, 'wb') as file:
+        file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, 0))
+        for instance in instances:
+            index.append((instance.capacity, len(instance.weights), file.tell()))
+            file.write(__int64_bytes(instance.weights))
+            file.write(__int64_bytes(instance.values))
+
+        index_offset: int = file.tell()
+        for entry in index:
+            file.write(BINARY_INDEX.pack(*entry))
+
+        # Fill in the header now that the count and index offset are known.
+        file.seek(0)
+        file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(index), index_offset))
+    return len(index)
+
+
+class KnapsackBinaryFile(Sequence):
+    """
+    A read-only sequence of the instances in a memory-mapped binary file.
+    Only the index is read when the file is opened, and each instance is a
+    KnapsackArrayInstance whose weights and values are memoryviews into the
+    mapping, so nothing is copied until a solver reads the items. The
+    mapping is released once the file and all of its instances are gone.
+    """
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self.mapping: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, index_offset = BINARY_HEADER.unpack_from(self.mapping)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f'{path} is not a binary knapsack file')
+        if version != BINARY_VERSION:
+            raise ValueError(f'{path} has version {version}, but only version {BINARY_VERSION} is supported')
+
+        self.view: memoryview = memoryview(self.mapping)
+        self.index: list = list(BINARY_INDEX.iter_unpack(self.view[index_offset:index_offset + count * BINARY_INDEX.size]))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+
+        capacity, num_items, offset = self.index[idx]
+        weights = self.view[offset:offset + 8 * num_items]
+        values = self.view[offset + 8 * num_items:offset + 16 * num_items]
+        if sys.byteorder == 'little':
+            return KnapsackArrayInstance(capacity, weights.cast('q'), values.cast('q'))
+
+        weights, values = array('q', weights.tobytes()), array('q', values.tobytes())
+        weights.byteswap()
+        values.byteswap()
+        return KnapsackArrayInstance(capacity, weights, values)
+
+
+def read_binary(path: str) -> KnapsackBinaryFile:
+    return KnapsackBinaryFile(path)
+
+
+def iter_instances(path: str, format: str):
+    """
+    Streams the instances in a file of the given format, one of FORMATS,
+    without reading the whole file into memory first.
+    """
+    if format not in FORMATS:
+        raise ValueError(f'format must be one of {FORMATS}, not {format!r}')
+
+    if format == 'pisinger':
+        return iter_pisinger(path)
+    if format == 'orlib':
+        return iter((read_orlib(path),))
+    return iter(read_binary(path))
+
+
+def write_instances(path: str, instances, format: str):
+    """
+    Writes the instances to a file of the given format, one of FORMATS. An
+    OR-Library style file holds exactly one instance.
+    """
+    if format not in FORMATS:
+        raise ValueError(f'format must be one of {FORMATS}, not {format!r}')
+
+    if format == 'pisinger':
+        write_pisinger(path, instances)
+    elif format == 'binary':
+        write_binary(path, instances)
+    else:
+        instances = list(instances)
+        if len(instances) != 1:
+            raise ValueError(f'an OR-Library style file holds one instance, not {len(instances)}')
+        write_orlib(path, instances[0])
@@ -0,0 +1,132 @@
+from .knapsack import KnapsackArrayInstance
+import numpy as np
+
+# References:
+# [1] D. Pisinger, Core problems in knapsack algorithms, 1999.
+# [2] D. Pisinger, Where are the hard knapsack problems?, 2005.
+
+KINDS = (
+    'uncorrelated',
+    'weakly_correlated',
+    'strongly_correlated',
+    'inverse_strongly_correlated',
+    'subset_sum',
+    'spanner'
+)
+
+
+class BulkKnapsackGenerator:
+    """
+    Generates many KnapsackArrayInstance objects at once from a seeded NumPy
+    random generator, so a test set is drawn with a few array operations
+    instead of two randint() calls per item, and the same seed always
+    reproduces the same instances.
+
+    Weights are drawn uniformly from [1, coefficient_range], with R standing
+    for coefficient_range, and the values depend on the kind of instance:
+
+        uncorrelated:                values uniform in [1, R]
+        weakly_correlated:           values uniform in [w - R/10, w + R/10], at least 1
+        strongly_correlated:         values w + R/10
+        inverse_strongly_correlated: values uniform in [1, R], weights v + R/10
+        subset_sum:                  values w
+        spanner:                     multiples of a few spanner items
+
+    Spanner instances draw spanner_size strongly correlated items, scaled
+    down by 2/spanner_multiplier, and each item is one of them multiplied
+    by a random factor in [1, spanner_multiplier]. The capacity of each
+    instance is capacity_ratio times its total weight.
+    """
+    def __init__(
+        self,
+        num_items: int = 100,
+        kind: str = 'uncorrelated',
+        coefficient_range: int = 1000,
+        capacity_ratio: float = 0.5,
+        seed: int = None,
+        spanner_size: int = 2,
+        spanner_multiplier: int = 10
+    ):
+        if kind not in KINDS:
+            raise ValueError(f'kind must be one of {KINDS}, not {kind!r}')
+        if num_items < 1 or coefficient_range < 1:
+            raise ValueError('num_items and coefficient_range must be at least 1')
+        if not 0 < capacity_ratio <= 1:
+            raise ValueError(f'capacity_ratio must be in (0, 1], not {capacity_ratio}')
+
+        self.num_items = num_items
+        self.kind = kind
+        self.coefficient_range = coefficient_range
+        self.capacity_ratio = capacity_ratio
+        self.spanner_size = max(1, spanner_size)
+        self.spanner_multiplier = max(1, spanner_multiplier)
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+
+    def __coefficients(self, shape: tuple) -> tuple:
+        """
+        Draws a (weights, values) pair of int64 arrays of the given shape.
+        """
+        rng: np.random.Generator = self.rng
+        high: int = self.coefficient_range
+        tenth: int = max(1, high // 10)
+
+        if self.kind == 'inverse_strongly_correlated':
+            values: np.ndarray = rng.integers(1, high, size=shape, endpoint=True)
+            return values + tenth, values
+
+        weights: np.ndarray = rng.integers(1, high, size=shape, endpoint=True)
+        if self.kind == 'uncorrelated':
+            values = rng.integers(1, high, size=shape, endpoint=True)
+        elif self.kind == 'weakly_correlated':
+            values = np.maximum(weights + rng.integers(-tenth, tenth, size=shape, endpoint=True), 1)
+        elif self.kind == 'strongly_correlated':
+            values = weights + tenth
+        else:
+            values = weights.copy()
+        return weights, values
+
+    def __spanner(self, count: int) -> tuple:
+        """
+        Draws the spanner items of each instance, and builds every item as a
+        random multiple of a random spanner item.
+        """
+        rng: np.random.Generator = self.rng
+        multiplier: int = self.spanner_multiplier
+        tenth: int = max(1, self.coefficient_range // 10)
+
+        spanner_weights: np.ndarray = rng.integers(
+            1, self.coefficient_range, size=(count, self.spanner_size), endpoint=True
+        )
+        spanner_values: np.ndarray = spanner_weights + tenth
+        spanner_weights = -(-2 * spanner_weights // multiplier)
+        spanner_values = -(-2 * spanner_values // multiplier)
+
+        choice: np.ndarray = rng.integers(0, self.spanner_size, size=(count, self.num_items))
+        factor: np.ndarray = rng.integers(1, multiplier, size=(count, self.num_items), endpoint=True)
+        rows: np.ndarray = np.arange(count)[:, None]
+        return factor * spanner_weights[rows, choice], factor * spanner_values[rows, choice]
+
+    def generate_many(self, count: int) -> list:
+        """
+        Generates count instances with a single draw per coefficient. The
+        weights and values of each instance are rows of one array, and are
+        shared with it rather than copied.
+        """
+        if self.kind == 'spanner':
+            weights, values = self.__spanner(count)
+        else:
+            weights, values = self.__coefficients((count, self.num_items))
+
+        weights = np.ascontiguousarray(weights, dtype=np.int64)
+        values = np.ascontiguousarray(values, dtype=np.int64)
+        capacities: np.ndarray = np.maximum(
+            (weights.sum(axis=1) * self.capacity_ratio).astype(np.int64), 1
+        )
+
+        return [
+            KnapsackArrayInstance(int(capacities[idx]), weights[idx], values[idx])
+            for idx in range(count)
+        ]
+
+    def generate(self) -> KnapsackArrayInstance:
+        return self.generate_many(1)[0]
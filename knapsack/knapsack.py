@@ -1,6 +1,9 @@
 import random
+from array import array
 from dataclasses import dataclass
+from functools import cached_property
 from collections import namedtuple
+from collections.abc import Sequence
 
 
 KnapsackAllocation = namedtuple('allocation', ('knapsack', 'value'))
@@ -31,6 +34,194 @@ class KnapsackInstance:
     def to_tuple(self):
         return f'({self.capacity}, {[i.weight for i in self.items]}, {[i.value for i in self.items]})'
 
+    # The derived views below are shared with KnapsackArrayInstance, so that
+    # solvers can use either type. The items list may change, so they are
+    # recomputed on every access rather than cached.
+
+    @property
+    def weights(self) -> list:
+        return [item.weight for item in self.items]
+
+    @property
+    def values(self) -> list:
+        return [item.value for item in self.items]
+
+    @property
+    def ratio_order(self) -> list:
+        return _ratio_order(self.weights, self.values)
+
+    @property
+    def prefix_weights(self) -> list:
+        return _prefix_sums(self.weights, self.ratio_order)
+
+    @property
+    def prefix_values(self) -> list:
+        return _prefix_sums(self.values, self.ratio_order)
+
+    @property
+    def total_weight(self) -> int:
+        return sum(item.weight for item in self.items)
+
+    @property
+    def total_value(self) -> int:
+        return sum(item.value for item in self.items)
+
+
+# Buffer formats which can be read item by item as Python numbers.
+_BUFFER_FORMATS = ('b', 'B', 'h', 'H', 'i', 'I', 'l', 'L', 'q', 'Q', 'f', 'd')
+
+
+def _as_array(sequence):
+    """
+    Returns sequence as a contiguous array without copying it where
+    possible. Arrays are kept as they are, and other one-dimensional
+    buffers of numbers, e.g., NumPy arrays, are wrapped in a memoryview,
+    which reads them as Python ints or floats. Anything else is copied into
+    an array('q'), or an array('d') for floats, and only integers too
+    large for 64 bits are left in a list.
+    """
+    if isinstance(sequence, array):
+        return sequence
+
+    try:
+        view: memoryview = memoryview(sequence)
+    except TypeError:
+        pass
+    else:
+        if view.ndim == 1 and view.format in _BUFFER_FORMATS:
+            return view
+
+    sequence = list(sequence)
+    try:
+        return array('q', sequence)
+    except (TypeError, OverflowError):
+        pass
+    if all(isinstance(element, float) for element in sequence):
+        return array('d', sequence)
+    return sequence
+
+
+def _ratio_order(weights, values) -> list:
+    """
+    Returns the item indices in descending order of value-weight ratio, where
+    weightless items come first. Ties keep their original order.
+    """
+    return sorted(
+        range(len(weights)),
+        key=lambda idx: values[idx] / weights[idx] if weights[idx] else float('inf'),
+        reverse=True
+    )
+
+
+def _prefix_sums(sequence, order: list) -> list:
+    """
+    Returns the cumulative sums of sequence taken in the given order,
+    starting with zero.
+    """
+    sums: list = [0]
+    for idx in order:
+        sums.append(sums[-1] + sequence[idx])
+    return sums
+
+
+class KnapsackItems(Sequence):
+    """
+    A read-only view of the items of a KnapsackArrayInstance, which creates
+    each KnapsackItem on access instead of storing them.
+    """
+    def __init__(self, weights, values):
+        self.weights = weights
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [KnapsackItem(self.weights[i], self.values[i]) for i in range(*idx.indices(len(self)))]
+        return KnapsackItem(self.weights[idx], self.values[idx])
+
+    def __iter__(self):
+        return map(KnapsackItem, self.weights, self.values)
+
+
+class KnapsackArrayInstance:
+    """
+    Stores a knapsack instance as a capacity integer and two contiguous
+    arrays of weights and values, which take 16 bytes per item instead of
+    over 100 for a list of KnapsackItems. The weights and values may be
+    passed as array('q') objects or any other buffer, e.g., NumPy arrays,
+    without being copied, or as lists, which are copied into arrays.
+
+    The ratio order, prefix sums and totals used by the solvers are
+    computed on first access and cached, so the arrays must not be modified
+    afterwards. The items attribute is a view of KnapsackItems, so the
+    instance can be passed anywhere a KnapsackInstance is expected.
+    """
+    def __init__(self, capacity: int, weights, values):
+        if len(weights) != len(values):
+            raise ValueError(f'got {len(weights)} weights but {len(values)} values')
+
+        self.capacity: int = capacity
+        self.weights = _as_array(weights)
+        self.values = _as_array(values)
+
+    @classmethod
+    def from_instance(cls, instance: KnapsackInstance) -> 'KnapsackArrayInstance':
+        """
+        Converts a KnapsackInstance, and returns a KnapsackArrayInstance as
+        it is.
+        """
+        if isinstance(instance, cls):
+            return instance
+        return cls(instance.capacity, instance.weights, instance.values)
+
+    def to_instance(self) -> KnapsackInstance:
+        return KnapsackInstance(self.capacity, list(self.items))
+
+    def __reduce__(self):
+        # Memoryviews cannot be pickled, so they are sent as arrays.
+        return self.__class__, (self.capacity, *(
+            array(sequence.format, sequence.tobytes()) if isinstance(sequence, memoryview) else sequence
+            for sequence in (self.weights, self.values)
+        ))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (KnapsackInstance, KnapsackArrayInstance)):
+            return NotImplemented
+        return self.capacity == other.capacity \
+            and list(self.weights) == list(other.weights) and list(self.values) == list(other.values)
+
+    def __repr__(self) -> str:
+        return f'KnapsackArrayInstance(capacity={self.capacity}, num_items={len(self.weights)})'
+
+    __str__ = KnapsackInstance.__str__
+    to_tuple = KnapsackInstance.to_tuple
+
+    @cached_property
+    def items(self) -> KnapsackItems:
+        return KnapsackItems(self.weights, self.values)
+
+    @cached_property
+    def ratio_order(self) -> list:
+        return _ratio_order(self.weights, self.values)
+
+    @cached_property
+    def prefix_weights(self) -> list:
+        return _prefix_sums(self.weights, self.ratio_order)
+
+    @cached_property
+    def prefix_values(self) -> list:
+        return _prefix_sums(self.values, self.ratio_order)
+
+    @cached_property
+    def total_weight(self) -> int:
+        return sum(self.weights)
+
+    @cached_property
+    def total_value(self) -> int:
+        return sum(self.values)
+
 
 class KnapsackGenerator:
     """
@@ -1,5 +1,47 @@
-from .greedy import greedy_solver, ratio_greedy_solver
-from .dyn_prog import dynamic_programming_solver
-from .branch_bound import branch_and_bound_solver
-from .sim_anneal import simulated_annealing_solver
-from .genetic import genetic_algorithm_solver
+# The solvers are loaded lazily (PEP 562): importing this package only
+# records where each name lives, and its module, along with NumPy and any
+# other heavy dependency, is imported on first access. A short-lived script
+# which only needs greedy_solver never imports the rest.
+import importlib
+
+__LOCATIONS: dict = {
+    'greedy_solver': 'greedy',
+    'ratio_greedy_solver': 'greedy',
+    'dynamic_programming_solver': 'dyn_prog',
+    'branch_and_bound_solver': 'branch_bound',
+    'parallel_branch_and_bound_solver': 'branch_bound',
+    'simulated_annealing_solver': 'sim_anneal',
+    'parallel_simulated_annealing_solver': 'sim_anneal',
+    'genetic_algorithm_solver': 'genetic',
+    'reduce_instance': 'preprocess',
+    'KnapsackReduction': 'preprocess',
+    'solve_many': 'batch',
+    'BatchResult': 'batch',
+    'SolutionCache': 'cache',
+    'KnapsackSession': 'session',
+    'auto_solver': 'auto',
+    'fptas_solver': 'fptas'
+}
+
+__all__ = list(__LOCATIONS)
+
+
+def __getattr__(name: str):
+    if name not in __LOCATIONS:
+        # Submodules, e.g., knapsack.solvers.dyn_prog, are still attributes
+        # of the package, as they were when it imported them all.
+        try:
+            return importlib.import_module(f'.{name}', __name__)
+        except ModuleNotFoundError as error:
+            if error.name != f'{__name__}.{name}':
+                raise
+            raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+
+    # Cache the attribute, so that later lookups skip this function.
+    value = getattr(importlib.import_module(f'.{__LOCATIONS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
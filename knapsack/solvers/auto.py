@@ -0,0 +1,324 @@
+from knapsack import KnapsackInstance, KnapsackArrayInstance, KnapsackAllocation
+from .greedy import ratio_greedy_solver
+from .dyn_prog import dynamic_programming_solver
+from .branch_bound import branch_and_bound_solver, MAX_QUEUE
+from .preprocess import linear_relaxation_bound
+from .budget import SolverBudget
+from .progress import SolverProgress, phase
+import bisect
+import math
+
+# References:
+# [1] R. S. Dembo, P. L. Hammer, A reduction algorithm for knapsack problems, 1980.
+# [2] D. Pisinger, An expanding-core algorithm for the exact 0-1 knapsack problem, 1995.
+# [3] D. Pisinger, Core problems in knapsack algorithms, 1999.
+
+DP_CELL_LIMIT: int = 10 ** 7  # Cells below which the whole instance goes to DP
+CORE_CELL_LIMIT: int = 10 ** 9  # Cells allowed for a single core DP
+CORE_SIZE: int = 16  # Items either side of the break item in the first core
+STRONG_CORRELATION: float = 0.995  # Weight-value correlation needing a wider core
+QUEUE_BITS: int = 2 ** 31  # Path bits allowed in the branch and bound queue
+
+
+def __features(instance: KnapsackInstance) -> dict:
+    """
+    Summarises what makes an instance hard for each engine: dynamic
+    programming costs n * capacity, or n * sum(values) over the value axis,
+    and strongly correlated weights and values give little for bounds to
+    separate, so branch and bound struggles and the core must be wider.
+    """
+    weights = instance.weights
+    values = instance.values
+    integer_weights: bool = all(isinstance(w, int) for w in weights) and isinstance(instance.capacity, int)
+    integer_values: bool = all(isinstance(v, int) for v in values)
+
+    n: int = len(weights)
+    dp_cells = math.inf
+    if integer_weights:
+        dp_cells = n * (instance.capacity + 1)
+        if integer_values:
+            dp_cells = min(dp_cells, n * (sum(v for v in values if v > 0) + 1))
+
+    correlation: float = 0.0
+    if n > 1:
+        import numpy as np
+        with np.errstate(invalid='ignore', divide='ignore'):
+            correlation = float(np.corrcoef(
+                np.asarray(weights, dtype=np.float64), np.asarray(values, dtype=np.float64)
+            )[0, 1])
+        if math.isnan(correlation):
+            correlation = 0.0
+
+    return {
+        'items': n,
+        'capacity': instance.capacity,
+        'value_range': (min(values), max(values)) if n else None,
+        'correlation': correlation,
+        'integer_weights': integer_weights,
+        'integer_values': integer_values,
+        'dp_cells': dp_cells
+    }
+
+
+def __greedy(instance: KnapsackInstance) -> KnapsackAllocation:
+    """
+    The better of the ratio greedy allocation and the most valuable item
+    that fits on its own, which is at least half the optimal value.
+    """
+    allocation: KnapsackAllocation = ratio_greedy_solver(instance)
+    weights = instance.weights
+    values = instance.values
+    fitting: list = [idx for idx in range(len(values)) if weights[idx] <= instance.capacity]
+    if fitting:
+        best: int = max(fitting, key=lambda idx: values[idx])
+        if values[best] > allocation.value:
+            return KnapsackAllocation([best], values[best])
+    return allocation
+
+
+def __solve_core(
+    instance: KnapsackInstance,
+    order: list,
+    lo: int,
+    hi: int,
+    budget: SolverBudget
+) -> tuple:
+    """
+    Fixes the items before the core, in ratio order, into the knapsack and
+    those after it out, and solves the core exactly by dynamic programming
+    with the remaining capacity. Returns the allocation and whether the
+    core was solved to optimality within the budget.
+    """
+    weights = instance.weights
+    values = instance.values
+    core: list = order[lo:hi]
+    fixed: list = order[:lo]
+
+    core_instance: KnapsackArrayInstance = KnapsackArrayInstance(
+        instance.capacity - instance.prefix_weights[lo],
+        [weights[idx] for idx in core],
+        [values[idx] for idx in core]
+    )
+    core_stats: dict = {}
+    allocation: KnapsackAllocation = dynamic_programming_solver(
+        core_instance, time_limit=budget.remaining, stats=core_stats
+    )
+
+    knapsack: list = [core[idx] for idx in allocation.knapsack] + fixed
+    return KnapsackAllocation(knapsack, allocation.value + instance.prefix_values[lo]), core_stats['optimal']
+
+
+def __core_proven(reduced_costs: list, lo: int, hi: int, threshold: int) -> bool:
+    """
+    Any allocation which differs from the core's fixing on item j is worth
+    at most the linear relaxation bound minus |c_j|, the reduced cost of j,
+    scaled by the break item weight. Every item before the core must have
+    c_j >= threshold, and every item after it -c_j >= threshold, for no
+    such allocation to beat the incumbent [1].
+    """
+    return all(reduced_costs[k] >= threshold for k in range(lo)) \
+        and all(-reduced_costs[k] >= threshold for k in range(hi, len(reduced_costs)))
+
+
+def auto_solver(
+    instance: KnapsackInstance,
+    time_limit: float = None,
+    stats: dict = None,
+    callback=None
+) -> KnapsackAllocation:
+    """
+    Solves the instance exactly, choosing the engine from the number of
+    items, the capacity, the values and the correlation between weights and
+    values, and trying the cheapest route to a proof of optimality first:
+
+    1. If every item fits, the knapsack holds every valuable item.
+    2. The better of the ratio greedy allocation and the best single item
+       is optimal if it meets the linear relaxation bound, rounded down.
+    3. Without integer weights, dynamic programming is impossible, so the
+       instance goes to branch and bound.
+    4. If dynamic programming over the whole instance costs at most
+       DP_CELL_LIMIT cells, on the shorter of the capacity and value axes,
+       it is solved that way.
+    5. Otherwise, as in Pisinger's expanding core algorithm [2], the items
+       around the break item in ratio order form a core, which is solved by
+       dynamic programming with the items before it fixed in and the items
+       after it fixed out. The core allocation is optimal if the reduced
+       cost of every item outside the core proves, as in the Dembo-Hammer
+       reduction [1], that changing it cannot do better. If not, the core
+       doubles in size. Strongly correlated instances start with a core
+       four times wider, since their optimal cores are larger [3].
+    6. If the next core would cost more than CORE_CELL_LIMIT cells, or the
+       time runs out, the instance goes to branch and bound, warm-started
+       from the best allocation so far.
+
+    The solve stops after time_limit seconds, returning the best allocation
+    so far. If a stats dictionary is passed, it records the features of the
+    instance under 'features', the route taken under 'strategy', the
+    reason for each decision under 'reasons', the size of each core tried
+    under 'core_sizes', and the stats of the last engine run under
+    'engine_stats', along with 'optimal', 'gap' and the time spent in each
+    phase. callback(value, elapsed) is called with the greedy value and
+    then with the final value, if it is better.
+    """
+    # The ratio order and prefix sums are read many times, so they are
+    # computed once and cached by an array instance.
+    instance = KnapsackArrayInstance.from_instance(instance)
+    budget: SolverBudget = SolverBudget(time_limit)
+    progress: SolverProgress = SolverProgress(callback)
+    reasons: list = []
+    core_sizes: list = []
+    engine_stats: dict = {}
+
+    def finish(allocation: KnapsackAllocation, strategy: str, optimal: bool, gap) -> KnapsackAllocation:
+        if allocation.value > best.value:
+            progress.improved(allocation.value)
+        if stats is not None:
+            stats['features'] = features
+            stats['strategy'] = strategy
+            stats['reasons'] = reasons
+            stats['core_sizes'] = core_sizes
+            stats['engine_stats'] = engine_stats
+            stats['optimal'] = optimal
+            stats['gap'] = gap
+        return allocation
+
+    with phase(stats, 'analyse'):
+        features: dict = __features(instance)
+        weights = instance.weights
+        values = instance.values
+        n: int = len(weights)
+
+        best: KnapsackAllocation = KnapsackAllocation([], 0)
+        if instance.total_weight <= instance.capacity:
+            reasons.append('every item fits in the knapsack')
+            knapsack: list = [idx for idx in range(n) if values[idx] > 0]
+            return finish(KnapsackAllocation(knapsack, sum(values[idx] for idx in knapsack)), 'trivial', True, 0)
+
+        best = __greedy(instance)
+        progress.improved(best.value)
+        upper_bound = linear_relaxation_bound(instance)
+        if features['integer_values']:
+            upper_bound = math.floor(upper_bound)
+        if best.value >= upper_bound:
+            reasons.append(f'the greedy value {best.value} meets the linear relaxation bound')
+            return finish(best, 'greedy', True, 0)
+        reasons.append(f'the greedy value {best.value} is below the linear relaxation bound {upper_bound}')
+
+    if not features['integer_weights']:
+        reasons.append('weights are not integers, which rules out dynamic programming')
+        return __branch_and_bound(instance, best, features, budget, stats, engine_stats, finish)
+
+    if features['dp_cells'] <= DP_CELL_LIMIT:
+        reasons.append(f'dynamic programming needs {features["dp_cells"]} cells, within DP_CELL_LIMIT')
+        return __dynamic_programming(instance, best, budget, stats, engine_stats, reasons, finish)
+
+    reasons.append(f'dynamic programming needs {features["dp_cells"]} cells, over DP_CELL_LIMIT')
+    if not features['integer_values']:
+        reasons.append('values are not integers, so the core cannot be proven optimal')
+        return __branch_and_bound(instance, best, features, budget, stats, engine_stats, finish)
+
+    # The break item is the first item in ratio order which does not fit.
+    # The reduced costs c_j = v_j * w_b - v_b * w_j are scaled by the break
+    # item weight, so that all the arithmetic stays exact.
+    order: list = instance.ratio_order
+    break_idx: int = bisect.bisect_right(instance.prefix_weights, instance.capacity) - 1
+    break_weight: int = weights[order[break_idx]]
+    break_value: int = values[order[break_idx]]
+    reduced_costs: list = [values[idx] * break_weight - break_value * weights[idx] for idx in order]
+    scaled_bound: int = instance.capacity * break_value + sum(c for c in reduced_costs if c > 0)
+
+    radius: int = CORE_SIZE
+    if features['correlation'] >= STRONG_CORRELATION:
+        radius *= 4
+        reasons.append(f'weights and values are strongly correlated ({features["correlation"]:.2f}), so the core starts wider')
+
+    with phase(stats, 'core'):
+        while True:
+            lo: int = max(0, break_idx - radius)
+            hi: int = min(n, break_idx + radius + 1)
+            residual: int = instance.capacity - instance.prefix_weights[lo]
+            core_values: int = sum(max(0, values[idx]) for idx in order[lo:hi])
+            core_cells: int = (hi - lo) * (min(residual, core_values) + 1)
+            if core_cells > CORE_CELL_LIMIT:
+                reasons.append(f'a core of {hi - lo} items needs {core_cells} cells, over CORE_CELL_LIMIT')
+                break
+
+            core_sizes.append(hi - lo)
+            allocation, solved = __solve_core(instance, order, lo, hi, budget)
+            if allocation.value > best.value:
+                progress.improved(allocation.value)
+                best = allocation
+            if not solved:
+                reasons.append(f'the core of {hi - lo} items ran out of time')
+                break
+
+            # An allocation must beat the incumbent by at least one, so any
+            # item whose reduced cost caps its deviations at the incumbent
+            # value stays fixed.
+            threshold: int = scaled_bound - (best.value + 1) * break_weight + 1
+            if __core_proven(reduced_costs, lo, hi, threshold):
+                reasons.append(f'the reduced costs outside the core of {hi - lo} items prove it optimal')
+                return finish(best, 'core', True, 0)
+            if lo == 0 and hi == n:
+                reasons.append('the core covers every item')
+                return finish(best, 'core', True, 0)
+            radius *= 2
+
+    # Bounds barely separate the allocations of strongly correlated
+    # instances, so branch and bound would be hopeless there, unless the
+    # whole instance is far beyond what dynamic programming can manage.
+    if features['correlation'] >= STRONG_CORRELATION and features['dp_cells'] <= 10 * CORE_CELL_LIMIT:
+        reasons.append('branch and bound prunes little on strongly correlated instances, so dynamic programming solves every item')
+        return __dynamic_programming(instance, best, budget, stats, engine_stats, reasons, finish)
+    return __branch_and_bound(instance, best, features, budget, stats, engine_stats, finish)
+
+
+def __dynamic_programming(
+    instance: KnapsackInstance,
+    best: KnapsackAllocation,
+    budget: SolverBudget,
+    stats: dict,
+    engine_stats: dict,
+    reasons: list,
+    finish
+) -> KnapsackAllocation:
+    """
+    Solves the whole instance by dynamic programming, keeping the best
+    allocation so far if it runs out of time.
+    """
+    with phase(stats, 'solve'):
+        allocation: KnapsackAllocation = dynamic_programming_solver(
+            instance, time_limit=budget.remaining, stats=engine_stats
+        )
+    if not engine_stats['optimal']:
+        reasons.append('dynamic programming ran out of time')
+        allocation = max(allocation, best, key=lambda a: a.value)
+    return finish(allocation, 'dynamic_programming', engine_stats['optimal'], engine_stats['gap'])
+
+
+def __branch_and_bound(
+    instance: KnapsackInstance,
+    best: KnapsackAllocation,
+    features: dict,
+    budget: SolverBudget,
+    stats: dict,
+    engine_stats: dict,
+    finish
+) -> KnapsackAllocation:
+    """
+    Falls back on branch and bound, with the Martello-Toth bound for integer
+    values, starting from the best allocation found so far. Every queued
+    node holds a bit per item, so the queue is shortened for large
+    instances to keep it within QUEUE_BITS.
+    """
+    bound: str = 'martello_toth' if features['integer_values'] else 'dantzig'
+    with phase(stats, 'solve'):
+        allocation: KnapsackAllocation = branch_and_bound_solver(
+            instance,
+            bound=bound,
+            max_queue=max(1, min(MAX_QUEUE, QUEUE_BITS // max(1, features['items']))),
+            time_limit=budget.remaining,
+            stats=engine_stats,
+            incumbent=best.knapsack
+        )
+    return finish(allocation, 'branch_and_bound', engine_stats['optimal'], engine_stats['gap'])
@@ -0,0 +1,164 @@
+from knapsack import KnapsackInstance, KnapsackArrayInstance, KnapsackAllocation
+from .dyn_prog import dynamic_programming_solver
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from collections import namedtuple
+import inspect
+import itertools
+import os
+
+
+BatchResult = namedtuple('result', ('index', 'allocation', 'error', 'stats'))
+BatchResult.__doc__ = \
+    """Stores the outcome of one instance solved by solve_many(), where exactly one of allocation and error is None"""
+
+
+CHUNKSIZE: int = 16  # Instances sent to a worker at once
+MAX_PENDING: int = 4  # Chunks queued per worker, so long batches stream
+
+
+def __solve(solver, options: dict, with_stats: bool, index: int, instance: KnapsackInstance) -> BatchResult:
+    """
+    Solves one instance, and returns any exception it raises in the result
+    rather than letting it end the batch.
+    """
+    stats: dict = {} if with_stats else None
+    try:
+        if with_stats:
+            allocation = solver(instance, stats=stats, **options)
+        else:
+            allocation = solver(instance, **options)
+    except Exception as error:
+        return BatchResult(index, None, error, stats)
+    return BatchResult(index, allocation, None, stats)
+
+
+def __solve_chunk(solver, options: dict, with_stats: bool, chunk: list) -> list:
+    """
+    Solves a chunk of (index, KnapsackArrayInstance) pairs in a worker
+    process. Array instances pickle their weights and values as raw bytes,
+    which is far smaller than a list of KnapsackItems. The results are sent
+    back as plain tuples, since the namedtuples cannot be pickled by name.
+    """
+    results: list = []
+    for index, instance in chunk:
+        index, allocation, error, stats = __solve(solver, options, with_stats, index, instance)
+        results.append((index, None if allocation is None else tuple(allocation), error, stats))
+    return results
+
+
+def __compact(index: int, instance: KnapsackInstance) -> tuple:
+    """
+    Converts an instance to send to a worker, and returns any exception the
+    conversion raises, e.g., for an entry which is not an instance, rather
+    than letting it end the batch.
+    """
+    try:
+        return index, KnapsackArrayInstance.from_instance(instance), None
+    except Exception as error:
+        return index, None, error
+
+
+def __solve_many(instances, solver, workers: int, chunksize: int, ordered: bool, with_stats: bool, options: dict):
+    """
+    Yields a BatchResult for each instance, for solve_many() once its
+    arguments are checked.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for index, instance in enumerate(instances):
+            yield __solve(solver, options, with_stats, index, instance)
+        return
+
+    # Chunks are numbered in input order, so that ordered results can be
+    # held back until every earlier chunk has been yielded.
+    compact = itertools.starmap(__compact, enumerate(instances))
+    chunks = enumerate(iter(lambda: list(itertools.islice(compact, chunksize)), []))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: dict = {}
+        completed: dict = {}
+        next_chunk: int = 0
+
+        def submit():
+            for number, entries in itertools.islice(chunks, workers * MAX_PENDING - len(pending)):
+                chunk: list = [(index, instance) for index, instance, error in entries if error is None]
+                failed: list = [BatchResult(index, None, error, None) for index, _, error in entries if error is not None]
+                future = executor.submit(__solve_chunk, solver, options, with_stats, chunk)
+                pending[future] = (number, [index for index, _ in chunk], failed)
+
+        try:
+            submit()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    number, indices, failed = pending.pop(future)
+                    try:
+                        results: list = [
+                            BatchResult(index, None if allocation is None else KnapsackAllocation(*allocation), error, stats)
+                            for index, allocation, error, stats in future.result()
+                        ]
+                    except Exception as error:
+                        # The worker itself failed, e.g., it was killed or the
+                        # results could not be pickled, so the whole chunk fails.
+                        results = [BatchResult(index, None, error, None) for index in indices]
+                    # Instances which could not be converted never reached the
+                    # worker, and take their place back in input order.
+                    completed[number] = sorted(results + failed, key=lambda result: result.index)
+                submit()
+
+                if ordered:
+                    while next_chunk in completed:
+                        yield from completed.pop(next_chunk)
+                        next_chunk += 1
+                else:
+                    for number in list(completed):
+                        yield from completed.pop(number)
+        finally:
+            # Don't start queued chunks if the caller stops early.
+            for future in pending:
+                future.cancel()
+
+
+def solve_many(
+    instances,
+    solver=dynamic_programming_solver,
+    workers: int = None,
+    chunksize: int = CHUNKSIZE,
+    ordered: bool = False,
+    time_limit: float = None,
+    **options
+):
+    """
+    Solves every instance in the iterable instances with solver, which must
+    be a module-level function such as those in knapsack.solvers, and returns
+    an iterator of a BatchResult for each one. Results are yielded as soon as their chunk
+    completes, or in input order if ordered is True. Any extra keyword
+    arguments are passed on to the solver.
+
+    The instances are split into chunks of chunksize, and each chunk is sent
+    to one of workers processes, one per CPU core by default, as
+    KnapsackArrayInstances. Instances are read lazily, with at most
+    MAX_PENDING chunks queued per worker, so a long iterable is streamed
+    rather than loaded into memory. With a single worker, the instances are
+    solved in this process instead.
+
+    An exception raised by the solver, or by converting an entry which is
+    not an instance, is stored in the result of that instance, and the rest
+    of the batch carries on. If time_limit is set,
+    each instance gets that many seconds, and a solver that runs out
+    returns its best allocation so far. For solvers that accept a stats
+    dictionary, it is returned in the result, and records e.g. whether the
+    allocation is optimal.
+    """
+    # The arguments are checked here rather than in the generator, so that a
+    # bad one raises when solve_many is called instead of at the first result.
+    if chunksize < 1:
+        raise ValueError(f'chunksize must be at least 1, not {chunksize}')
+
+    parameters = inspect.signature(solver).parameters
+    with_stats: bool = 'stats' in parameters
+    if time_limit is not None:
+        if 'time_limit' not in parameters:
+            raise ValueError(f'{solver.__name__} does not accept a time_limit')
+        options['time_limit'] = time_limit
+    return __solve_many(instances, solver, workers, chunksize, ordered, with_stats, options)
@@ -1,128 +1,702 @@
-from knapsack import KnapsackInstance, KnapsackAllocation
-from dataclasses import dataclass
+from knapsack import KnapsackInstance, KnapsackArrayInstance, KnapsackAllocation, KnapsackItem
+from .preprocess import KnapsackReduction, reduce_instance
+from .greedy import ratio_greedy_solver
+from .budget import SolverBudget
+from .progress import SolverProgress, phase
 from collections import deque
+import bisect
+import heapq
+import time
+import os
 
 # References:
 # [0] https://www.geeksforgeeks.org/implementation-of-0-1-knapsack-using-branch-and-bound/?ref=lbp
 # [1] https://stackoverflow.com/questions/43965835/knapsack-branch-and-bound-wrong-result
+# [2] S. Martello, P. Toth, An upper bound for the zero-one knapsack problem and a branch and bound algorithm, 1977.
 
-@dataclass
-class KnapsackNode:
-    level: int  # The level of the node in the decision tree [i.e., the item index]
-    value: int  # The total value on this path in the decision tree
-    bound: int  # The upper bound of maximum profit in the subtree of this node
-    weight: int  # The total weight on this path in the decision tree
-    allocation: list  # The allocation (knapsack) found by this path in the decision tree
+# Nodes in the decision tree are plain tuples (-bound, -level, value, weight, path):
+#   bound: The upper bound of maximum profit in the subtree of this node
+#   level: The level of the node in the decision tree [i.e., the sorted item index]
+#   value: The total value on this path in the decision tree
+#   weight: The total weight on this path in the decision tree
+#   path: A bitmask over the sorted items, where bit k is set if item k is included
+# Negating the bound and level means a min-heap pops the most promising node
+# first, preferring deeper nodes on ties, and no node ever copies its path.
 
 
-def __bound(node: KnapsackNode, n_items: int, capacity: int, items: list):
+def __dantzig_bound(
+    level: int,
+    value: int,
+    weight: int,
+    capacity: int,
+    items: list,
+    prefix_weights: list,
+    prefix_values: list
+):
     """
     We relax the strict binary constraint on the decision variables such
     that items may be partially included in the knapsack. This problem,
-    known as the fractional knapsack problem, can be solved in linear
-    time by a greedy algorithm. This algorithm is utilitised below to 
-    identify an upper bound on the maximum value achievable at this node. 
+    known as the fractional knapsack problem, can be solved by a greedy
+    algorithm, which adds the remaining sorted items until one does not
+    fit, and then as much of that item as possible. The prefix sums of the
+    sorted weights let us find that break item by binary search, so each
+    bound costs O(log n) rather than O(n).
     """
-    
+
     # Invalid Node
-    if node.weight >= capacity:
+    if weight >= capacity:
         return 0
-    
-    # We are finding the upper bound based on the remaining elements
-    # given the actual [binary constraint] value we have achieved so far.
-    value_bound: int = node.value
-    level: int = node.level + 1
-    weight: int = node.weight
-
-    # Add remaining items in the order they are passed into the function
-    # until the capacity is exhausted, or we run out of items.
-    while level < n_items and weight + items[level][1].weight <= capacity:
-        weight += items[level][1].weight
-        value_bound += items[level][1].value
-        level += 1
-    
-    # If the capacity is exhausted, we add as much of the last item as 
+
+    # The remaining items {level + 1, ..., break_idx - 1} all fit, and the
+    # break item is the first one that does not.
+    start: int = level + 1
+    break_idx: int = bisect.bisect_right(
+        prefix_weights, prefix_weights[start] + capacity - weight
+    ) - 1
+    value_bound = value + prefix_values[break_idx] - prefix_values[start]
+
+    # If the capacity is exhausted, we add as much of the break item as
     # possible to the bound to give the upper bound.
-    if level < n_items:
-        value_bound += (capacity - weight) * \
-            items[level][1].value / items[level][1].weight
-    
+    if break_idx < len(items):
+        residual: int = capacity - weight - (prefix_weights[break_idx] - prefix_weights[start])
+        value_bound += residual * items[break_idx][1].value / items[break_idx][1].weight
+
     return value_bound
 
 
-def branch_and_bound_solver(knapsack: KnapsackInstance) -> KnapsackAllocation:
+def __martello_toth_bound(
+    level: int,
+    value: int,
+    weight: int,
+    capacity: int,
+    items: list,
+    prefix_weights: list,
+    prefix_values: list
+):
     """
-    We start with a root knapsack node, and then generate child nodes which
-    do or do not contain each successive item in a sorted list. We expand
-    promising nodes, i.e., nodes which have an upper bound, as defined by
-    a constraint relaxation, that is higher than the current best value.
-    These promising nodes eventually lead to the returned optimal solution.
+    The Martello-Toth bound U2 branches on the break item instead of taking
+    a fraction of it. Without the break item, the residual capacity can at
+    best be filled at the ratio of the next item. With it, we must remove
+    enough weight from the previous item, at best losing value at its ratio.
+    The larger of the two is an upper bound, and it is never weaker than
+    the fractional bound. Integer values let us round both down.
+    """
+
+    # Invalid Node
+    if weight >= capacity:
+        return 0
+
+    start: int = level + 1
+    break_idx: int = bisect.bisect_right(
+        prefix_weights, prefix_weights[start] + capacity - weight
+    ) - 1
+    value_bound = value + prefix_values[break_idx] - prefix_values[start]
+
+    if break_idx == len(items):
+        return value_bound
+
+    residual: int = capacity - weight - (prefix_weights[break_idx] - prefix_weights[start])
+    integer: bool = isinstance(value_bound, int)
+
+    # Exclude the break item and fill the residual at the next item's ratio:
+    without_break = value_bound
+    if break_idx + 1 < len(items):
+        next_item = items[break_idx + 1][1]
+        without_break += residual * next_item.value // next_item.weight if integer \
+            else residual * next_item.value / next_item.weight
+
+    # Include the break item, which needs a free item before it to give up
+    # the missing weight at its ratio:
+    with_break = without_break
+    if break_idx > start:
+        break_item = items[break_idx][1]
+        prev_item = items[break_idx - 1][1]
+        missing: int = break_item.weight - residual
+        with_break = value_bound + break_item.value - (
+            -(-missing * prev_item.value // prev_item.weight) if integer
+            else missing * prev_item.value / prev_item.weight
+        )
+
+    return max(without_break, with_break)
+
+
+STRATEGIES = ('best', 'breadth')
+BOUNDS = {'dantzig': __dantzig_bound, 'martello_toth': __martello_toth_bound}
+MAX_NODES: int = None  # Nodes expanded before giving up, None for no limit
+MAX_QUEUE: int = 1000000  # Nodes held in the queue before diving depth-first
+
+
+def __branch_and_bound_solver(
+    knapsack: KnapsackInstance,
+    strategy: str,
+    bound: str,
+    max_queue: int,
+    lower_bound,
+    budget: SolverBudget,
+    progress: SolverProgress,
+    stats: dict
+) -> KnapsackAllocation:
+    """
+    Searches the decision tree over the items sorted by value-weight ratio,
+    expanding one node per step of the budget. If lower_bound is the value
+    of a known allocation, only better allocations are searched for, and
+    None is returned if there are none.
     """
 
     # The items are sorted by their value-weight ratio for the bound algorithm,
-    # which uses a greedy approach:
-    items: list = [(pid, cand) for pid, cand in enumerate(knapsack.items)]
-    items: list = sorted(items, key=lambda i: i[1].value/i[1].weight, reverse=True)
+    # which uses a greedy approach. An array instance sorts them once for the
+    # order, the prefix sums and the greedy allocation below.
+    knapsack = KnapsackArrayInstance.from_instance(knapsack)
+    all_items = knapsack.items
+    items: list = [(pid, all_items[pid]) for pid in knapsack.ratio_order]
+    n_items: int = len(items)
+    capacity: int = knapsack.capacity
+
+    # The cumulative weights and values of the sorted items are cached by
+    # the array instance, so that each bound only needs a binary search.
+    prefix_weights: list = knapsack.prefix_weights
+    prefix_values: list = knapsack.prefix_values
+
+    # The bound is called directly, and only wrapped to time each call when
+    # stats are recorded.
+    node_bound = BOUNDS[bound]
+    bound_calls: int = 0
+    bound_time: float = 0.0
+    if stats is not None:
+        untimed_bound = node_bound
 
-    # Make a queue to traverse the decision tree:
-    queue: deque = deque()
-    queue.append(KnapsackNode(-1, 0, 0, 0, []))  # Root Node
+        def node_bound(*arguments):
+            nonlocal bound_calls, bound_time
+            start: float = time.perf_counter()
+            result = untimed_bound(*arguments)
+            bound_time += time.perf_counter() - start
+            bound_calls += 1
+            return result
 
-    max_value: int = 0
-    max_allocation: list = []
+    # Make a queue to traverse the decision tree, and a stack to dive
+    # depth-first when the queue is full:
+    root_bound = node_bound(-1, 0, 0, capacity, items, prefix_weights, prefix_values)
+    queue = [] if strategy == 'best' else deque()
+    push = (lambda node: heapq.heappush(queue, node)) if strategy == 'best' else queue.append
+    pop = (lambda: heapq.heappop(queue)) if strategy == 'best' else queue.popleft
+    stack: list = [(-root_bound, 1, 0, 0, 0)]  # Root Node
+
+    # Seed the incumbent with the ratio greedy allocation, so that we prune
+    # from the start and an early stop still returns a good allocation.
+    positions: dict = {pid: k for k, (pid, _) in enumerate(items)}
+    greedy: KnapsackAllocation = ratio_greedy_solver(knapsack)
+    max_value: int = greedy.value
+    max_path: int = sum(1 << positions[pid] for pid in greedy.knapsack)
+    if lower_bound is not None and lower_bound > max_value:
+        max_value = lower_bound
+        max_path = None
+    progress.improved(max_value)
+    nodes_expanded: int = 0
+    nodes_pruned: int = 0
+    optimal: bool = True
 
     # Each knapsack node has a level attribute, which considers all
     # items in the item subset {1, ..., level}.
-    while queue:
-        curr: KnapsackNode = queue.popleft()
-        child: KnapsackNode = KnapsackNode(0, 0, 0, 0, [])
-
-        # If curr is the root node, then the child is
-        # at level zero:
-        if curr.level == -1:
-            child.level = 0
-        
-        # If the current level (item subset) considers all items,
+    while queue or stack:
+        neg_bound, neg_level, value, weight, path = stack.pop() if stack else pop()
+        level: int = -neg_level
+
+        # The incumbent may have improved since this node was queued.
+        # If the current level (item subset) considers all items,
         # then there is nothing more to be done:
-        if curr.level == len(items) - 1:
+        if -neg_bound <= max_value or level == n_items - 1:
+            nodes_pruned += 1
             continue
 
+        if not budget.step():
+            # Put the node back so that its bound counts towards the gap.
+            stack.append((neg_bound, neg_level, value, weight, path))
+            optimal = False
+            break
+        nodes_expanded += 1
+
         # Our first possible child considers the solution with the
         # current item (level) included:
-        child.level = curr.level + 1
-        child.weight = curr.weight + items[child.level][1].weight
-        child.value = curr.value + items[child.level][1].value
-        child.allocation = curr.allocation[:] + [items[child.level][0]]
+        child_level: int = level + 1
+        child_weight: int = weight + items[child_level][1].weight
+        child_value: int = value + items[child_level][1].value
+        child_path: int = path | (1 << child_level)
 
         # If our child node is valid and has the largest value so far,
-        # update the max_value and max_allocation values.
-        if child.weight <= knapsack.capacity and child.value > max_value:
-            max_value = child.value
-            max_allocation = child.allocation
+        # update the max_value and max_path values.
+        if child_weight <= capacity and child_value > max_value:
+            max_value = child_value
+            max_path = child_path
+            progress.improved(max_value)
 
         # The upper bound tells us the optimal solution given the child
         # node provided we can partially include the remaining items
-        # {level + 1, ..., n}.
-        child.bound = __bound(child, len(items), knapsack.capacity, items)
-        
-        # If the child bound is larger than the max_value, then there
-        # is still 'potential', so add it to the queue.
-        if child.bound > max_value:
-            queue.append(child)
+        # {level + 1, ..., n}. If it is larger than the max_value, then
+        # there is still 'potential', so add it to the queue.
+        child_bound = node_bound(
+            child_level, child_value, child_weight, capacity, items, prefix_weights, prefix_values
+        )
+        children: list = []
+        if child_bound > max_value:
+            children.append((-child_bound, -child_level, child_value, child_weight, child_path))
+        else:
+            nodes_pruned += 1
 
         # We repeat the process for a child node that does not include
-        # the current item (level). We do not try to update the 
-        # max_value or max_allocation variables.
+        # the current item (level). We do not try to update the
+        # max_value or max_path variables.
+        child_bound = node_bound(child_level, value, weight, capacity, items, prefix_weights, prefix_values)
+        if child_bound > max_value:
+            children.append((-child_bound, -child_level, value, weight, path))
+        else:
+            nodes_pruned += 1
+
+        if stack or len(queue) >= max_queue:
+            # Push the included child last so the dive explores it first.
+            stack.extend(reversed(children))
+        else:
+            for child in children:
+                push(child)
+
+    if stats is not None:
+        stats['nodes_expanded'] = nodes_expanded
+        stats['nodes_pruned'] = nodes_pruned
+        stats['incumbent_updates'] = progress.improvements
+        stats['bounds_computed'] = bound_calls
+        stats['bound_time'] = bound_time
+        stats['optimal'] = optimal
+        stats['gap'] = 0 if optimal else \
+            max(-node[0] for node in (*stack, *queue)) - max_value
+
+    if max_path is None:
+        return None
+    allocation: list = [items[k][0] for k in range(n_items) if max_path >> k & 1]
+    return KnapsackAllocation(allocation, max_value)
+
+
+def branch_and_bound_solver(
+    knapsack: KnapsackInstance,
+    strategy: str = 'best',
+    bound: str = 'dantzig',
+    max_nodes: int = MAX_NODES,
+    max_queue: int = MAX_QUEUE,
+    preprocess: bool = True,
+    time_limit: float = None,
+    stats: dict = None,
+    callback=None,
+    incumbent: list = None
+) -> KnapsackAllocation:
+    """
+    We start with a root knapsack node, and then generate child nodes which
+    do or do not contain each successive item in a sorted list. We expand
+    promising nodes, i.e., nodes which have an upper bound, as defined by
+    a constraint relaxation, that is higher than the current best value.
+    These promising nodes eventually lead to the returned optimal solution.
+
+    The 'best' strategy always expands the node with the largest bound next,
+    using a priority queue, while 'breadth' expands nodes level by level.
+    Once the queue holds max_queue nodes, children are explored depth-first
+    on a separate stack instead, which keeps memory bounded without losing
+    optimality.
+
+    The search starts from the ratio greedy allocation, and stops after
+    max_nodes expansions or time_limit seconds, returning the best
+    allocation found so far. It is then not proven optimal, and
+    stats['gap'] holds the largest bound left unexplored minus its value.
+
+    The bound is either the fractional 'dantzig' bound, or the tighter
+    'martello_toth' bound, which is best suited to integer values.
+
+    Unless preprocess is False, the instance is first shrunk by
+    reduce_instance(), and the reduction is summarised under
+    stats['reduction'] if a stats dictionary is passed. The stats also
+    record the number of nodes expanded and pruned, the number of bounds
+    computed and the time spent computing them, the number of incumbent
+    updates, the time spent in each phase, and whether the result is optimal.
+
+    If a callback is passed, callback(value, elapsed) is called with the
+    greedy starting value and then with each better value found.
+
+    A feasible allocation may be passed as a list of item indices in
+    incumbent, e.g. the optimum before the instance was edited, to
+    warm-start the search. It replaces the greedy allocation if it is
+    better, so far more of the tree is pruned from the start, and it is
+    returned if nothing better exists.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f'strategy must be one of {STRATEGIES}, not {strategy!r}')
+    if bound not in BOUNDS:
+        raise ValueError(f'bound must be one of {tuple(BOUNDS)}, not {bound!r}')
+
+    incumbent_value = None
+    if incumbent is not None:
+        incumbent = list(incumbent)
+        weights = knapsack.weights
+        values = knapsack.values
+        if sum(weights[idx] for idx in incumbent) > knapsack.capacity:
+            raise ValueError('the incumbent allocation exceeds the capacity')
+        incumbent_value = sum(values[idx] for idx in incumbent)
+
+    budget: SolverBudget = SolverBudget(time_limit, max_nodes)
+    progress: SolverProgress = SolverProgress(callback)
+
+    if not preprocess:
+        with phase(stats, 'search'):
+            allocation: KnapsackAllocation = __branch_and_bound_solver(
+                knapsack, strategy, bound, max_queue, incumbent_value, budget, progress, stats
+            )
+        return allocation if allocation is not None else KnapsackAllocation(incumbent, incumbent_value)
+
+    with phase(stats, 'preprocess'):
+        reduction: KnapsackReduction = reduce_instance(knapsack)
+    if stats is not None:
+        stats['reduction'] = reduction.summary()
+
+    # The search reports values for the reduced instance, which leaves out
+    # the items fixed into the knapsack. Every optimal allocation holds the
+    # fixed items, so the optimum of the reduced instance is at least the
+    # incumbent value without them.
+    progress.offset = reduction.fixed_value
+    lower_bound = incumbent_value - reduction.fixed_value if incumbent is not None else None
+    with phase(stats, 'search'):
+        allocation: KnapsackAllocation = __branch_and_bound_solver(
+            reduction.instance, strategy, bound, max_queue, lower_bound, budget, progress, stats
+        )
+    if allocation is None:
+        return KnapsackAllocation(incumbent, incumbent_value)
+    return reduction.expand(allocation)
+
+
+TASK_NODES: int = 20000  # Nodes a parallel task expands before donating the rest
+SPLIT_FACTOR: int = 4  # Subproblems per worker made when the tree is split
+
+# The state of a parallel branch and bound worker: the sorted items, their
+# prefix sums, the bound function and the shared incumbent value.
+__WORKER: dict = {}
+
+
+def __init_worker(capacity, weights: list, values: list, bound: str, incumbent):
+    """
+    Sets up a worker process with the items in value-weight ratio order, so
+    that each task only sends its nodes. The incumbent is a shared
+    multiprocessing.Value holding the best value found by any worker.
+    """
+    prefix_weights: list = [0]
+    prefix_values: list = [0]
+    for weight, value in zip(weights, values):
+        prefix_weights.append(prefix_weights[-1] + weight)
+        prefix_values.append(prefix_values[-1] + value)
+
+    __WORKER.update(
+        capacity=capacity,
+        items=[(k, KnapsackItem(weight, value)) for k, (weight, value) in enumerate(zip(weights, values))],
+        prefix_weights=prefix_weights,
+        prefix_values=prefix_values,
+        bound=BOUNDS[bound],
+        incumbent=incumbent
+    )
+
+
+def __node_bound(level: int, value, weight):
+    state: dict = __WORKER
+    return state['bound'](
+        level, value, weight, state['capacity'], state['items'], state['prefix_weights'], state['prefix_values']
+    )
+
+
+def __children(node: tuple, incumbent) -> tuple:
+    """
+    Expands a node into the children whose bounds beat the incumbent, and
+    returns them with the value and path of the included child if it fits,
+    or None, and the number of children pruned.
+    """
+    state: dict = __WORKER
+    _, neg_level, value, weight, path = node
+    child_level: int = -neg_level + 1
+    item: KnapsackItem = state['items'][child_level][1]
+    child_weight = weight + item.weight
+    child_value = value + item.value
+    child_path: int = path | (1 << child_level)
+
+    found: tuple = None
+    if child_weight <= state['capacity'] and child_value > incumbent:
+        found = (child_value, child_path)
+        incumbent = child_value
+
+    children: list = []
+    pruned: int = 0
+    child_bound = __node_bound(child_level, child_value, child_weight)
+    if child_bound > incumbent:
+        children.append((-child_bound, -child_level, child_value, child_weight, child_path))
+    else:
+        pruned += 1
+    child_bound = __node_bound(child_level, value, weight)
+    if child_bound > incumbent:
+        children.append((-child_bound, -child_level, value, weight, path))
+    else:
+        pruned += 1
+
+    return children, found, pruned
+
+
+def __expand(nodes: list, max_nodes: int, time_limit: float) -> tuple:
+    """
+    Searches the subtrees under the nodes depth-first, pruning with the
+    shared incumbent, for up to max_nodes expansions or time_limit seconds.
+    Returns the best (value, path) found by this task, or None, the nodes
+    left unexplored for the parent to hand to other workers, and the
+    numbers of nodes expanded and pruned.
+    """
+    state: dict = __WORKER
+    shared = state['incumbent']
+    last_level: int = len(state['items']) - 1
+    deadline: float = None if time_limit is None else time.monotonic() + time_limit
+
+    incumbent = shared.value
+    best: tuple = None
+    expanded: int = 0
+    pruned: int = 0
+
+    # The included child is pushed last so that it is explored first.
+    stack: list = sorted(nodes, reverse=True)
+    while stack:
+        if expanded >= max_nodes or (deadline is not None and time.monotonic() >= deadline):
+            break
+
+        node: tuple = stack.pop()
+        # Other workers raise the shared incumbent, so it is re-read often.
+        if expanded % 64 == 0:
+            incumbent = max(incumbent, shared.value)
+        if -node[0] <= incumbent or -node[1] == last_level:
+            pruned += 1
+            continue
+
+        expanded += 1
+        children, found, children_pruned = __children(node, incumbent)
+        pruned += children_pruned
+        if found is not None:
+            with shared.get_lock():
+                if found[0] > shared.value:
+                    shared.value = found[0]
+            incumbent = max(found[0], shared.value)
+            best = found
+        stack.extend(reversed(children))
+
+    return best, stack, expanded, pruned
+
+
+def __parallel_search(
+    knapsack: KnapsackInstance,
+    bound: str,
+    workers: int,
+    lower_bound,
+    time_limit: float,
+    progress: SolverProgress,
+    stats: dict
+) -> KnapsackAllocation:
+    """
+    Splits the tree over the items sorted by value-weight ratio at its
+    first few levels, and searches the subtrees in a pool of workers which
+    share the incumbent value. Tasks which run out of nodes to expand
+    return their unexplored subtrees, which are queued by bound and given
+    to the next idle worker. Returns None if nothing beats lower_bound.
+    """
+    # The process pool is only imported by the parallel solver.
+    from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+    import multiprocessing
+
+    # As in the serial search, the items are sorted once.
+    knapsack = KnapsackArrayInstance.from_instance(knapsack)
+    order: list = knapsack.ratio_order
+    all_weights = knapsack.weights
+    all_values = knapsack.values
+    weights: list = [all_weights[pid] for pid in order]
+    values: list = [all_values[pid] for pid in order]
+    start: float = time.perf_counter()
+
+    # The incumbent must be exact to prune exactly, so integer values are
+    # shared as int64 whenever they fit.
+    integer: bool = all(isinstance(value, int) for value in values) and sum(values) < 2 ** 63
+    greedy: KnapsackAllocation = ratio_greedy_solver(knapsack)
+    positions: dict = {pid: k for k, pid in enumerate(order)}
+    best_value = greedy.value
+    best_path: int = sum(1 << positions[pid] for pid in greedy.knapsack)
+    if lower_bound is not None and lower_bound > best_value:
+        best_value = lower_bound
+        best_path = None
+    incumbent = multiprocessing.Value('q' if integer else 'd', best_value)
+    progress.improved(best_value)
+
+    # The parent splits the tree with the same state as the workers.
+    __init_worker(knapsack.capacity, weights, values, bound, incumbent)
+    frontier: list = [(-__node_bound(-1, 0, 0), 1, 0, 0, 0)] if values else []
+    expanded: int = 0
+    pruned: int = 0
+    while frontier and len(frontier) < SPLIT_FACTOR * workers:
+        level_nodes: list = []
+        for node in frontier:
+            if -node[0] <= best_value or -node[1] == len(values) - 1:
+                pruned += 1
+                continue
+            expanded += 1
+            children, found, children_pruned = __children(node, best_value)
+            pruned += children_pruned
+            if found is not None:
+                best_value, best_path = found
+                incumbent.value = best_value
+                progress.improved(best_value)
+            level_nodes.extend(children)
+        frontier = level_nodes
+
+    # Subproblems are queued by their best bound, so the most promising
+    # subtrees are searched first.
+    queue: list = [(node[0], [node]) for node in frontier]
+    heapq.heapify(queue)
+    # The bound of each running task's subtrees, which still count towards
+    # the gap if the search stops before they finish.
+    pending: dict = {}
+    tasks: int = 0
+    donated: int = 0
+    optimal: bool = True
+    executor: ProcessPoolExecutor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=__init_worker,
+            initargs=(knapsack.capacity, weights, values, bound, incumbent)
+        )
+
+    def remaining() -> float:
+        return None if time_limit is None else time_limit - (time.perf_counter() - start)
+
+    def submit(nodes: list) -> Future:
+        if executor is not None:
+            return executor.submit(__expand, nodes, TASK_NODES, remaining())
+        future: Future = Future()
+        future.set_result(__expand(nodes, TASK_NODES, remaining()))
+        return future
+
+    try:
+        while queue or pending:
+            if time_limit is not None and remaining() <= 0:
+                optimal = False
+                break
+
+            while queue and len(pending) < 2 * workers:
+                neg_bound, nodes = heapq.heappop(queue)
+                if -neg_bound > incumbent.value:
+                    pending[submit(nodes)] = -neg_bound
+                    tasks += 1
+                else:
+                    pruned += len(nodes)
+
+            if not pending:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                found, unexplored, task_expanded, task_pruned = future.result()
+                expanded += task_expanded
+                pruned += task_pruned
+                if found is not None and found[0] > best_value:
+                    best_value, best_path = found
+                    progress.improved(best_value)
+
+                # A task that ran out of expansions donates its unexplored
+                # subtrees, split so that idle workers can share them.
+                if unexplored:
+                    chunk: int = -(-len(unexplored) // workers)
+                    for idx in range(0, len(unexplored), chunk):
+                        nodes: list = unexplored[idx:idx + chunk]
+                        heapq.heappush(queue, (min(node[0] for node in nodes), nodes))
+                        donated += 1
+    finally:
+        if executor is not None:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    if stats is not None:
+        left: list = [-neg_bound for neg_bound, _ in queue] + list(pending.values())
+        stats['workers'] = workers
+        stats['tasks'] = tasks
+        stats['donated'] = donated
+        stats['nodes_expanded'] = expanded
+        stats['nodes_pruned'] = pruned
+        stats['incumbent_updates'] = progress.improvements
+        stats['optimal'] = optimal
+        stats['gap'] = 0 if optimal else max(0, max(left, default=best_value) - best_value)
+
+    if best_path is None:
+        return None
+    allocation: list = [order[k] for k in range(len(order)) if best_path >> k & 1]
+    return KnapsackAllocation(allocation, best_value)
+
+
+def parallel_branch_and_bound_solver(
+    knapsack: KnapsackInstance,
+    workers: int = None,
+    bound: str = 'dantzig',
+    preprocess: bool = True,
+    time_limit: float = None,
+    stats: dict = None,
+    callback=None,
+    incumbent: list = None
+) -> KnapsackAllocation:
+    """
+    Runs branch and bound in a pool of worker processes, one per CPU core by
+    default, and returns the same optimal value as branch_and_bound_solver().
+
+    The decision tree over the items in value-weight ratio order is split
+    at its first few levels into about SPLIT_FACTOR subproblems per worker,
+    which are searched depth-first. Every worker prunes against the best
+    value found by any of them, which is shared through a
+    multiprocessing.Value. Each task expands at most TASK_NODES nodes and
+    then hands its unexplored subtrees back, and these are queued by bound
+    for whichever worker is idle next, so that one hard subtree is spread
+    over every core rather than left to a single one.
+
+    The bound, preprocess, time_limit, callback and incumbent arguments are
+    as for branch_and_bound_solver(). If a stats dictionary is passed, it
+    records the number of workers, the tasks run, the subtrees donated,
+    the nodes expanded and pruned, and whether the result is optimal.
+    """
+    if bound not in BOUNDS:
+        raise ValueError(f'bound must be one of {tuple(BOUNDS)}, not {bound!r}')
+    workers = workers or os.cpu_count() or 1
+
+    incumbent_value = None
+    if incumbent is not None:
+        incumbent = list(incumbent)
+        weights = knapsack.weights
+        values = knapsack.values
+        if sum(weights[idx] for idx in incumbent) > knapsack.capacity:
+            raise ValueError('the incumbent allocation exceeds the capacity')
+        incumbent_value = sum(values[idx] for idx in incumbent)
+
+    progress: SolverProgress = SolverProgress(callback)
+    start: float = time.perf_counter()
 
-        child = KnapsackNode(0, 0, 0, 0, [])
-        child.level = curr.level + 1
-        child.weight = curr.weight
-        child.value = curr.value
-        child.allocation = curr.allocation[:]
-        child.bound = __bound(child, len(items), knapsack.capacity, items)
+    if not preprocess:
+        with phase(stats, 'search'):
+            allocation: KnapsackAllocation = __parallel_search(
+                knapsack, bound, workers, incumbent_value, time_limit, progress, stats
+            )
+        return allocation if allocation is not None else KnapsackAllocation(incumbent, incumbent_value)
 
-        if child.bound > max_value:
-            queue.append(child)
-    
-    return KnapsackAllocation(max_allocation, max_value)
+    with phase(stats, 'preprocess'):
+        reduction: KnapsackReduction = reduce_instance(knapsack)
+    if stats is not None:
+        stats['reduction'] = reduction.summary()
 
+    progress.offset = reduction.fixed_value
+    lower_bound = incumbent_value - reduction.fixed_value if incumbent is not None else None
+    if time_limit is not None:
+        time_limit = max(0.0, time_limit - (time.perf_counter() - start))
+    with phase(stats, 'search'):
+        allocation: KnapsackAllocation = __parallel_search(
+            reduction.instance, bound, workers, lower_bound, time_limit, progress, stats
+        )
+    if allocation is None:
+        return KnapsackAllocation(incumbent, incumbent_value)
+    return reduction.expand(allocation)
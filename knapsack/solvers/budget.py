@@ -0,0 +1,41 @@
+import time
+
+
+class SolverBudget:
+    """
+    Tracks a wall-clock time limit, in seconds, and an iteration budget for
+    a solver. What counts as an iteration is up to the solver, e.g., one
+    dynamic programming row or one branch and bound node expansion. Either
+    limit may be None, in which case it never runs out.
+    """
+    def __init__(self, time_limit: float = None, max_iterations: int = None):
+        self.deadline: float = None if time_limit is None else time.monotonic() + time_limit
+        self.max_iterations: int = max_iterations
+        self.iterations: int = 0
+        self.exhausted: bool = False
+
+    def step(self) -> bool:
+        """
+        Counts one iteration, and returns False once the time limit has
+        passed or the iteration budget has been used up.
+        """
+        if self.exhausted:
+            return False
+
+        if (self.max_iterations is not None and self.iterations >= self.max_iterations) \
+                or (self.deadline is not None and time.monotonic() >= self.deadline):
+            self.exhausted = True
+            return False
+
+        self.iterations += 1
+        return True
+
+    @property
+    def remaining(self) -> float:
+        """
+        The seconds left before the time limit, or None if there is none,
+        so that a solver can hand what is left of its budget to another.
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
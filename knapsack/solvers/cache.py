@@ -0,0 +1,188 @@
+from knapsack import KnapsackInstance, KnapsackAllocation
+from .dyn_prog import dynamic_programming_solver
+from collections import OrderedDict
+import functools
+import hashlib
+import inspect
+import sqlite3
+import json
+
+
+class SolutionCache:
+    """
+    Caches optimal allocations by a canonical fingerprint of the instance:
+    a hash of the capacity and the (weight, value) pairs in sorted order.
+    The same items in any order share an entry, and a cached allocation is
+    stored as positions in the sorted order, which are mapped back onto the
+    caller's item indices on a hit.
+
+    Only allocations which the solver proved optimal are stored, so an
+    entry answers any exact solver, and a heuristic or a solve cut short by
+    a time limit never pollutes the cache.
+
+    Up to maxsize entries are kept in memory, evicting the least recently
+    used. If path is given, entries are also stored in an sqlite database
+    there, which outlives the process and can be shared by worker processes
+    that each open a SolutionCache on the same path.
+    """
+    def __init__(self, maxsize: int = 1024, path: str = None):
+        if maxsize < 0:
+            raise ValueError(f'maxsize must be at least 0, not {maxsize}')
+
+        self.maxsize: int = maxsize
+        self.path: str = path
+        self.entries: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.disk_hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.__connection: sqlite3.Connection = None
+
+    def __getstate__(self) -> dict:
+        # A connection cannot be pickled, so a copy sent to another process
+        # opens its own.
+        state: dict = self.__dict__.copy()
+        state['_SolutionCache__connection'] = None
+        return state
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self.__connection is None and self.path is not None:
+            self.__connection = sqlite3.connect(self.path, timeout=30)
+            self.__connection.execute(
+                'CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, positions TEXT, value TEXT)'
+            )
+            self.__connection.commit()
+        return self.__connection
+
+    @staticmethod
+    def fingerprint(instance: KnapsackInstance) -> tuple:
+        """
+        Returns the canonical key of the instance, and the order of its item
+        indices sorted by (weight, value), which maps canonical positions to
+        the caller's indices.
+        """
+        weights = instance.weights
+        values = instance.values
+        order: list = sorted(range(len(weights)), key=lambda idx: (weights[idx], values[idx]))
+
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr(instance.capacity).encode())
+        for idx in order:
+            digest.update(f';{weights[idx]!r},{values[idx]!r}'.encode())
+        return digest.hexdigest(), order
+
+    def __get(self, key: str) -> tuple:
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        if self.connection is not None:
+            row: tuple = self.connection.execute(
+                'SELECT positions, value FROM solutions WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                entry: tuple = (json.loads(row[0]), json.loads(row[1]))
+                self.__remember(key, entry)
+                return entry
+
+        self.misses += 1
+        return None
+
+    def __remember(self, key: str, entry: tuple):
+        if self.maxsize == 0:
+            return
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __put(self, key: str, entry: tuple):
+        self.__remember(key, entry)
+        if self.connection is not None:
+            with self.connection:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)',
+                    (key, json.dumps(entry[0]), json.dumps(entry[1]))
+                )
+
+    def solve(
+        self,
+        instance: KnapsackInstance,
+        solver=dynamic_programming_solver,
+        stats: dict = None,
+        callback=None,
+        **options
+    ) -> KnapsackAllocation:
+        """
+        Returns the cached allocation for the instance, remapped onto its
+        item order, or solves it with solver(instance, **options) and caches
+        the result if it is proven optimal. On a hit, stats records
+        'optimal' and 'gap' as the solver would, and callback is called once
+        with the value.
+        """
+        key, order = self.fingerprint(instance)
+        entry: tuple = self.__get(key)
+
+        if entry is not None:
+            positions, value = entry
+            if stats is not None:
+                stats['cache'] = 'hit'
+                stats['optimal'] = True
+                stats['gap'] = 0
+            if callback is not None:
+                callback(value, 0.0)
+            return KnapsackAllocation([order[position] for position in positions], value)
+
+        # The solver must report optimality for its result to be cached.
+        solver_stats: dict = stats if stats is not None else {}
+        parameters = inspect.signature(solver).parameters
+        if 'stats' in parameters:
+            options['stats'] = solver_stats
+        if callback is not None:
+            options['callback'] = callback
+
+        allocation: KnapsackAllocation = solver(instance, **options)
+        solver_stats['cache'] = 'miss'
+        if solver_stats.get('optimal'):
+            positions: dict = {idx: position for position, idx in enumerate(order)}
+            self.__put(key, (sorted(positions[idx] for idx in allocation.knapsack), allocation.value))
+        return allocation
+
+    def wrap(self, solver):
+        """
+        Returns a version of solver which answers from the cache, and takes
+        the same arguments.
+        """
+        @functools.wraps(solver)
+        def cached_solver(instance: KnapsackInstance, *args, **options) -> KnapsackAllocation:
+            if args:
+                raise TypeError('cached solvers only take keyword options')
+            return self.solve(instance, solver, **options)
+        return cached_solver
+
+    @property
+    def metrics(self) -> dict:
+        lookups: int = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else None,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'maxsize': self.maxsize
+        }
+
+    def clear(self):
+        """
+        Empties the in-memory cache and the database, and resets the metrics.
+        """
+        self.entries.clear()
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        if self.connection is not None:
+            with self.connection:
+                self.connection.execute('DELETE FROM solutions')
@@ -0,0 +1,248 @@
+from collections import namedtuple
+import numpy as np
+
+# References:
+# [1] E. Balas, E. Zemel, An algorithm for large zero-one knapsack problems, 1980.
+# [2] S. Martello, P. Toth, Knapsack Problems: Algorithms and Computer Implementations, Section 2.2.2, 1990.
+# [3] R. W. Floyd, R. L. Rivest, Expected time bounds for selection, 1975.
+
+CriticalItem = namedtuple('critical', ('taken', 'index', 'residual'))
+CriticalItem.__doc__ = \
+    """Stores the items before the critical item in ratio order, which all fit, the critical item, or None if every item fits, and the capacity left after the taken items"""
+
+
+SORT_SIZE: int = 64  # Items below which a partition is finished by sorting
+SAMPLE_SIZE: int = 4096  # Items sampled to estimate the critical ratio
+SAMPLE_MARGIN: int = 128  # Sampled items either side of the estimate kept in the window
+FILL_ROUNDS: int = 8  # Partitions of the items after the critical item before sorting them
+EXACT_RANGE: int = 2 ** 53  # Integers below this are exact as float64
+
+
+def __exact_arrays(weights, values, capacity) -> tuple:
+    """
+    Converts the weights and values to NumPy arrays, without copying array
+    instances, if every ratio computed from them is the same as Python's
+    and every sum of weights fits in an int64. Otherwise returns None, and
+    the caller sorts instead.
+    """
+    weights = np.asarray(weights)
+    values = np.asarray(values)
+    if weights.dtype.kind not in 'iu' or values.dtype.kind not in 'iuf' or not isinstance(capacity, int):
+        return None
+    if weights.size and (int(weights.min()) < 0 or int(weights.max()) * weights.size >= 2 ** 63):
+        return None
+    if values.dtype.kind in 'iu' and values.size and max(-int(values.min()), int(values.max())) >= EXACT_RANGE:
+        return None
+    if weights.size and int(weights.max()) >= EXACT_RANGE:
+        return None
+    return weights.astype(np.int64, copy=False), values
+
+
+def __ratios(weights: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    The value-weight ratio of each item, where weightless items have an
+    infinite ratio, as in the ratio order.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios: np.ndarray = values / weights
+    ratios[weights == 0] = np.inf
+    return ratios
+
+
+def __estimate(ratios: np.ndarray, weights: np.ndarray, capacity: int) -> tuple:
+    """
+    Estimates the ratio of the critical item from an evenly spaced sample
+    of SAMPLE_SIZE candidates, and returns the ratios SAMPLE_MARGIN sample
+    items either side of it, which bracket the critical item with high
+    probability [3].
+    """
+    stride: int = max(1, ratios.size // SAMPLE_SIZE)
+    sample_ratios: np.ndarray = ratios[::stride]
+    order: np.ndarray = np.argsort(-sample_ratios)
+    cumulative: np.ndarray = np.cumsum(weights[::stride][order]) * stride
+    k: int = int(np.searchsorted(cumulative, capacity, side='right'))
+    return sample_ratios[order[max(k - SAMPLE_MARGIN, 0)]], sample_ratios[order[min(k + SAMPLE_MARGIN, order.size - 1)]]
+
+
+def __partition(ratios: np.ndarray, weights: np.ndarray, candidates: np.ndarray, capacity: int) -> tuple:
+    """
+    Finds the critical item among the candidates, given in ascending index
+    order, by weighted quickselect [1]. The candidates are split into those
+    above a high ratio, which are taken if they fit, those down to a low
+    ratio, and those below it, which are dropped if the ones above them
+    fill the knapsack, and the search carries on in whichever part holds
+    the critical item. The ratios come from a sample which usually leaves
+    a small window around the critical item, and otherwise from the median,
+    which always halves the candidates. Each split costs time linear in the
+    candidates left, so O(n) in all. Ties are taken in index order, as in
+    the stable ratio order.
+
+    Returns the list of arrays of the taken items, the critical item or
+    None, and the capacity left.
+    """
+    taken: list = []
+    sample: bool = True
+    while candidates.size > SORT_SIZE:
+        # The first split over every item skips gathering the arrays.
+        everything: bool = candidates.size == ratios.size
+        candidate_ratios: np.ndarray = ratios if everything else ratios[candidates]
+        candidate_weights: np.ndarray = weights if everything else weights[candidates]
+        if sample:
+            high, low = __estimate(candidate_ratios, candidate_weights, capacity)
+        else:
+            high = low = np.partition(candidate_ratios, candidates.size // 2)[candidates.size // 2]
+        size: int = candidates.size
+
+        above: np.ndarray = candidate_ratios > high
+        above_weight: int = int(candidate_weights[above].sum())
+        if above_weight > capacity:
+            candidates = candidates[above]
+        else:
+            taken.append(candidates[above])
+            capacity -= above_weight
+            window: np.ndarray = (candidate_ratios >= low) & ~above
+
+            if high == low:
+                # The window shares one ratio, so it is taken in index order.
+                cumulative: np.ndarray = np.cumsum(candidate_weights[window])
+                fitting: int = int(np.searchsorted(cumulative, capacity, side='right'))
+                taken.append(candidates[window][:fitting])
+                capacity -= int(cumulative[fitting - 1]) if fitting else 0
+                if fitting < cumulative.size:
+                    return taken, int(candidates[window][fitting]), capacity
+                candidates = candidates[candidate_ratios < low]
+            else:
+                window_weight: int = int(candidate_weights[window].sum())
+                if window_weight > capacity:
+                    candidates = candidates[window]
+                else:
+                    taken.append(candidates[window])
+                    capacity -= window_weight
+                    candidates = candidates[candidate_ratios < low]
+
+        # A sample that missed the critical item falls back on the median.
+        sample = candidates.size <= size // 2
+
+    # The last few candidates are cheaper to sort, by ratio and then index.
+    candidates = candidates[np.lexsort((candidates, -ratios[candidates]))]
+    cumulative: np.ndarray = np.cumsum(weights[candidates])
+    fitting: int = int(np.searchsorted(cumulative, capacity, side='right'))
+    taken.append(candidates[:fitting])
+    capacity -= int(cumulative[fitting - 1]) if fitting else 0
+    return taken, int(candidates[fitting]) if fitting < candidates.size else None, capacity
+
+
+def critical_item(weights, values, capacity) -> CriticalItem:
+    """
+    Finds the critical (break) item, i.e., the first item in descending
+    value-weight ratio which does not fit when the items before it are
+    taken, without sorting the items. This is all the linear relaxation
+    bound and the start of the ratio greedy fill need [2].
+
+    Instances whose ratios or weight sums NumPy cannot compute exactly,
+    e.g., with float weights or integers of 2^53 or more, are sorted
+    instead. Either way the result is the same as a scan of the ratio
+    order. The taken items are returned as an array of indices in no
+    particular order.
+    """
+    arrays: tuple = __exact_arrays(weights, values, capacity)
+    if arrays is None:
+        residual = capacity
+        taken: list = []
+        order: list = sorted(
+            range(len(weights)),
+            key=lambda idx: values[idx] / weights[idx] if weights[idx] else float('inf'),
+            reverse=True
+        )
+        for idx in order:
+            if weights[idx] > residual:
+                return CriticalItem(np.array(taken, dtype=np.int64), idx, residual)
+            taken.append(idx)
+            residual -= weights[idx]
+        return CriticalItem(np.array(taken, dtype=np.int64), None, residual)
+
+    weights, values = arrays
+    chunks, index, residual = __partition(
+        __ratios(weights, values), weights, np.arange(weights.size), capacity
+    )
+    return CriticalItem(np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64), index, residual)
+
+
+def sum_values(values, indices, positive: bool = False):
+    """
+    Sums the values of the items at indices, or only the positive ones, in
+    NumPy when the sum is exact.
+    """
+    array: np.ndarray = np.asarray(values)
+    if array.dtype.kind in 'iu' and array.size and max(-int(array.min()), int(array.max())) * len(indices) >= 2 ** 63:
+        array = None
+    if array is None or array.dtype.kind not in 'iuf':
+        return sum(value for value in (values[idx] for idx in indices) if not positive or value > 0)
+
+    selected: np.ndarray = array[np.asarray(indices, dtype=np.int64)]
+    if positive:
+        selected = selected[selected > 0]
+    return selected.sum().item()
+
+
+def greedy_fill(weights, values, critical: CriticalItem) -> list:
+    """
+    Carries the ratio greedy fill on past the critical item, and returns
+    the items after it which the fill takes in the capacity left.
+
+    Only items no heavier than the capacity left can ever be taken, and it
+    only shrinks, so each round drops the rest and partitions what is left
+    again: the items before the next critical item all fit, and the search
+    carries on after it. After FILL_ROUNDS rounds, the remaining items are
+    sorted, which bounds the cost when each round only drops a few items.
+    """
+    if critical.index is None or critical.residual <= 0:
+        return []
+
+    arrays: tuple = __exact_arrays(weights, values, critical.residual)
+    if arrays is None:
+        chosen: set = set(critical.taken.tolist())
+        residual = critical.residual
+        allocation: list = []
+        order: list = sorted(
+            (idx for idx in range(len(weights)) if idx not in chosen and weights[idx] <= residual),
+            key=lambda idx: values[idx] / weights[idx] if weights[idx] else float('inf'),
+            reverse=True
+        )
+        for idx in order:
+            if weights[idx] <= residual:
+                allocation.append(idx)
+                residual -= weights[idx]
+        return allocation
+
+    weights, values = arrays
+    ratios: np.ndarray = __ratios(weights, values)
+    remaining: np.ndarray = np.ones(weights.size, dtype=bool)
+    remaining[critical.taken] = False
+    remaining[critical.index] = False
+    candidates: np.ndarray = np.flatnonzero(remaining)
+    residual: int = critical.residual
+    allocation: list = []
+
+    for _ in range(FILL_ROUNDS):
+        candidates = candidates[weights[candidates] <= residual]
+        if candidates.size == 0 or residual <= 0:
+            return allocation
+        chunks, index, residual = __partition(ratios, weights, candidates, residual)
+        # Every taken item comes before the critical item in ratio order, so
+        # their order among themselves does not change what fits later.
+        for chunk in chunks:
+            allocation.extend(chunk.tolist())
+        if index is None:
+            return allocation
+        remaining[np.concatenate(chunks)] = False
+        remaining[index] = False
+        candidates = candidates[remaining[candidates]]
+
+    candidates = candidates[weights[candidates] <= residual]
+    candidates = candidates[np.lexsort((candidates, -ratios[candidates]))]
+    for idx, weight in zip(candidates.tolist(), weights[candidates].tolist()):
+        if weight <= residual:
+            allocation.append(idx)
+            residual -= weight
+    return allocation
@@ -1,12 +1,21 @@
 from knapsack import KnapsackInstance, KnapsackAllocation
+from .preprocess import KnapsackReduction, reduce_instance, linear_relaxation_bound
+from .greedy import ratio_greedy_solver
+from .budget import SolverBudget
+from .progress import SolverProgress, phase
+import numbers
+import math
 
 # References:
 # [1] https://medium.com/@fabianterh/how-to-solve-the-knapsack-problem-with-dynamic-programming-eb88c706d3cf
+# [2] D. S. Hirschberg, A linear space algorithm for computing maximal common subsequences, 1975.
+# [3] D. Pisinger, Dynamic programming on the word RAM, 2003.
 
-def dynamic_programming_solver(instance: KnapsackInstance) -> KnapsackAllocation:
+
+def __table_solver(instance: KnapsackInstance, budget: SolverBudget) -> KnapsackAllocation:
     """
     We build a dynamic programming matrix that holds the maximum value achievable
-    at any (i, j) pair, where i means we only have access to the first i items, 
+    at any (i, j) pair, where i means we only have access to the first i items,
     i.e., {1, 2, ..., i}, and j means we only have j budget available. The base
     cases are simple: dp[0][j] = 0 for all j because there are no items to choose
     from, and dp[i][0] = 0 for all i, assuming all values are positive, because
@@ -21,8 +30,12 @@ def dynamic_programming_solver(instance: KnapsackInstance) -> KnapsackAllocation
     ]
 
     # We iterate through every possible item subset with every possible
-    # integer budget {1, 2, ..., budget}.
+    # integer budget {1, 2, ..., budget}, until we run out of time.
+    processed: int = 0
     for i in range(1, len(instance.items) + 1):
+        if not budget.step():
+            break
+        processed = i
         for j in range(1, instance.capacity + 1):
             item = instance.items[i - 1]
 
@@ -35,7 +48,7 @@ def dynamic_programming_solver(instance: KnapsackInstance) -> KnapsackAllocation
             if not knapsack_can_hold:
                 dp[i][j] = value_without_item
                 continue
-            
+
             # Otherwise, our value is the current item value, plus the
             # maximum value achievable with the remaining items
             # {1, 2, ..., i - 1} and the remaining budget j - i.weight.
@@ -43,15 +56,17 @@ def dynamic_programming_solver(instance: KnapsackInstance) -> KnapsackAllocation
             value_with_item: int = dp[i - 1][j - item.weight] + item.value
             dp[i][j] = max(value_with_item, value_without_item)
 
-    # The best value is stored at the very end of the matrix. We can
+    # The best value is stored at the very end of the matrix. We can
     # find the optimal allocation that gives this value by backtracking.
-    best_value: int = dp[-1][-1]
+    # If we ran out of time, the last complete row holds the best value
+    # using only the items processed so far.
+    best_value: int = dp[processed][-1]
     allocation: list = []
-    i: int = len(instance.items)
+    i: int = processed
     j: int = instance.capacity
 
     # We add item indexes where the maximum value possible changes,
-    # because it must be the case that that item was included.
+    # because it must be the case that that item was included.
     while i > 0 and j > 0:
         if dp[i][j] != dp[i - 1][j]:
             allocation.append(i - 1)
@@ -59,3 +74,563 @@ def dynamic_programming_solver(instance: KnapsackInstance) -> KnapsackAllocation
         i -= 1
 
     return KnapsackAllocation(allocation, best_value)
+
+
+def __bitset_solver(instance: KnapsackInstance, budget: SolverBudget) -> KnapsackAllocation:
+    """
+    Only the last row of the dynamic programming matrix is ever read, so we
+    keep a single row and update it in place from the largest budget down,
+    such that dp[j - weight] still refers to the previous item subset. The
+    backtracking step only needs to know whether the value changed at each
+    (i, j) pair, so we record that decision as one bit in a packed matrix,
+    which is n * capacity bits rather than n * capacity Python integers.
+    """
+    capacity: int = instance.capacity
+    row: list = [0] * (capacity + 1)
+    taken: list = []
+
+    for item in instance.items:
+        if not budget.step():
+            break
+
+        # One bit per budget, set when including the item is strictly
+        # better, exactly where the full matrix would change value.
+        bits: bytearray = bytearray((capacity >> 3) + 1)
+        for j in range(capacity, item.weight - 1, -1):
+            value_with_item: int = row[j - item.weight] + item.value
+            if value_with_item > row[j]:
+                row[j] = value_with_item
+                bits[j >> 3] |= 1 << (j & 7)
+        taken.append(bits)
+
+    # Backtrack through the decision bits from the last item processed,
+    # in the same way as the full matrix does.
+    allocation: list = []
+    j: int = capacity
+    for i in range(len(taken) - 1, -1, -1):
+        if taken[i][j >> 3] >> (j & 7) & 1:
+            allocation.append(i)
+            j -= instance.items[i].weight
+
+    return KnapsackAllocation(allocation, row[capacity])
+
+
+def __numpy_bitset_solver(
+    instance: KnapsackInstance,
+    dtype: type,
+    budget: SolverBudget
+) -> KnapsackAllocation:
+    """
+    The same strategy as the bitset solver, except each row is updated in a
+    single vectorised pass: shifting the row by the item weight and adding
+    the item value gives the value with the item for every budget at once.
+    The decision bits are the budgets where that is strictly better.
+    """
+    import numpy as np
+    capacity: int = instance.capacity
+    row: np.ndarray = np.zeros(capacity + 1, dtype=dtype)
+    taken: list = []
+
+    for item in instance.items:
+        if not budget.step():
+            break
+
+        if item.weight > capacity:
+            taken.append(None)
+            continue
+
+        # The candidate is computed from the previous row before we update
+        # it in place, so no item is counted twice.
+        value_with_item: np.ndarray = row[:capacity + 1 - item.weight] + item.value
+        better: np.ndarray = value_with_item > row[item.weight:]
+        np.maximum(row[item.weight:], value_with_item, out=row[item.weight:])
+
+        # Bit k of the packed array is the decision for budget weight + k.
+        taken.append(np.packbits(better, bitorder='little'))
+
+    allocation: list = []
+    j: int = capacity
+    for i in range(len(taken) - 1, -1, -1):
+        weight: int = instance.items[i].weight
+        if taken[i] is None or j < weight:
+            continue
+        k: int = j - weight
+        if taken[i][k >> 3] >> (k & 7) & 1:
+            allocation.append(i)
+            j -= weight
+
+    return KnapsackAllocation(allocation, row[capacity].item())
+
+
+def __last_row(items: list, capacity: int, dtype: type, budget: SolverBudget) -> list:
+    """
+    Computes only the last row of the dynamic programming matrix for a list
+    of (pid, KnapsackItem) pairs, i.e., the best value for each budget. The
+    row is a NumPy array of the given dtype, or a list if dtype is None.
+    The row is incomplete if the budget runs out.
+    """
+    if dtype is not None:
+        import numpy as np
+        row: np.ndarray = np.zeros(capacity + 1, dtype=dtype)
+        for _, item in items:
+            if not budget.step():
+                break
+            if item.weight <= capacity:
+                value_with_item: np.ndarray = row[:capacity + 1 - item.weight] + item.value
+                np.maximum(row[item.weight:], value_with_item, out=row[item.weight:])
+        return row
+
+    row: list = [0] * (capacity + 1)
+    for _, item in items:
+        if not budget.step():
+            break
+        for j in range(capacity, item.weight - 1, -1):
+            value_with_item: int = row[j - item.weight] + item.value
+            if value_with_item > row[j]:
+                row[j] = value_with_item
+    return row
+
+
+def __hirschberg(
+    items: list,
+    capacity: int,
+    allocation: list,
+    dtype: type,
+    budget: SolverBudget
+):
+    """
+    Splits the (pid, KnapsackItem) pairs in half and computes the last row
+    for each half independently. The optimal allocation spends some budget
+    j on the first half and capacity - j on the second, and j is the split
+    maximising the sum of both rows. Each half is then solved recursively
+    with its share of the budget, so we never hold more than two rows.
+    """
+    if capacity < 0 or not items or budget.exhausted:
+        return
+
+    # If everything fits there is nothing to decide.
+    if sum(item.weight for _, item in items) <= capacity:
+        allocation.extend(pid for pid, item in items if item.value > 0)
+        return
+
+    if len(items) == 1:
+        pid, item = items[0]
+        if item.weight <= capacity and item.value > 0:
+            allocation.append(pid)
+        return
+
+    mid: int = len(items) // 2
+    left: list = __last_row(items[:mid], capacity, dtype, budget)
+    right: list = __last_row(items[mid:], capacity, dtype, budget)
+    if dtype is not None:
+        import numpy as np
+        split: int = int(np.argmax(left + right[::-1]))
+    else:
+        split: int = max(range(capacity + 1), key=lambda j: left[j] + right[capacity - j])
+
+    # Release the rows before recursing to keep peak memory at two rows.
+    del left, right
+
+    __hirschberg(items[:mid], split, allocation, dtype, budget)
+    __hirschberg(items[mid:], capacity - split, allocation, dtype, budget)
+
+
+def __hirschberg_solver(
+    instance: KnapsackInstance,
+    dtype: type,
+    budget: SolverBudget
+) -> KnapsackAllocation:
+    """
+    Recovers the optimal allocation by divide and conquer over the items,
+    which needs memory proportional to the capacity only, at roughly twice
+    the running time of the bitset strategy. There is no partial allocation
+    to fall back on if the budget runs out, so we return the ratio greedy
+    allocation instead.
+    """
+    allocation: list = []
+    __hirschberg(list(enumerate(instance.items)), instance.capacity, allocation, dtype, budget)
+    if budget.exhausted:
+        return ratio_greedy_solver(instance)
+    allocation.sort(reverse=True)
+
+    value: int = sum(instance.items[idx].value for idx in allocation)
+    return KnapsackAllocation(allocation, value)
+
+
+def __value_solver(
+    instance: KnapsackInstance,
+    total_value: int,
+    budget: SolverBudget
+) -> KnapsackAllocation:
+    """
+    Runs the dynamic programming over total value rather than capacity: the
+    row holds the minimum weight needed to achieve each value exactly, from
+    zero up to the total value of all items. The best value is then the
+    largest one whose minimum weight fits in the knapsack. This costs
+    O(n * total_value), which is far cheaper than O(n * capacity) when the
+    values are small and the capacity is large. Weights above the capacity
+    are all equally infeasible, so capacity + 1 stands in for infinity.
+    """
+    capacity: int = instance.capacity
+    infeasible: int = capacity + 1
+    row: list = [0] + [infeasible] * total_value
+    taken: list = []
+
+    for item in instance.items:
+        if not budget.step():
+            break
+
+        bits: bytearray = bytearray((total_value >> 3) + 1)
+        for v in range(total_value, item.value - 1, -1):
+            weight_with_item: int = row[v - item.value] + item.weight
+            if weight_with_item < row[v]:
+                row[v] = weight_with_item
+                bits[v >> 3] |= 1 << (v & 7)
+        taken.append(bits)
+
+    best_value: int = max(v for v in range(total_value + 1) if row[v] <= capacity)
+
+    allocation: list = []
+    v: int = best_value
+    for i in range(len(taken) - 1, -1, -1):
+        if taken[i][v >> 3] >> (v & 7) & 1:
+            allocation.append(i)
+            v -= instance.items[i].value
+
+    return KnapsackAllocation(allocation, best_value)
+
+
+def __numpy_value_solver(
+    instance: KnapsackInstance,
+    total_value: int,
+    budget: SolverBudget
+) -> KnapsackAllocation:
+    """
+    The vectorised form of the value-indexed solver, which updates each row
+    of minimum weights in a single np.minimum pass. The row is float64 if
+    any weight or the capacity is not an integer.
+    """
+    import numpy as np
+    capacity: int = instance.capacity
+    if isinstance(capacity, numbers.Integral) and all(isinstance(item.weight, numbers.Integral) for item in instance.items):
+        dtype: type = np.int32 if 2 * capacity < np.iinfo(np.int32).max else np.int64
+    else:
+        dtype: type = np.float64
+    row: np.ndarray = np.full(total_value + 1, capacity + 1, dtype=dtype)
+    row[0] = 0
+    taken: list = []
+
+    for item in instance.items:
+        if not budget.step():
+            break
+
+        if item.weight > capacity or item.value == 0:
+            taken.append(None)
+            continue
+
+        weight_with_item: np.ndarray = row[:total_value + 1 - item.value] + item.weight
+        better: np.ndarray = weight_with_item < row[item.value:]
+        np.minimum(row[item.value:], weight_with_item, out=row[item.value:])
+
+        # Bit k of the packed array is the decision for value item.value + k.
+        taken.append(np.packbits(better, bitorder='little'))
+
+    best_value: int = int(np.flatnonzero(row <= capacity)[-1])
+
+    allocation: list = []
+    v: int = best_value
+    for i in range(len(taken) - 1, -1, -1):
+        value: int = instance.items[i].value
+        if taken[i] is None or v < value:
+            continue
+        k: int = v - value
+        if taken[i][k >> 3] >> (k & 7) & 1:
+            allocation.append(i)
+            v -= value
+
+    return KnapsackAllocation(allocation, best_value)
+
+
+def __reachable(weights: list, start: int, end: int, reach: int, mask: int) -> list:
+    """
+    Returns the reachable weights before each item in [start, end), as bits
+    of a Python int, followed by the reachable weights after the last one.
+    """
+    sets: list = [reach]
+    for i in range(start, end):
+        reach |= (reach << weights[i]) & mask
+        sets.append(reach)
+    return sets
+
+
+def __bigint_solver(instance: KnapsackInstance, budget: SolverBudget) -> KnapsackAllocation:
+    """
+    When every value is the same multiple of its weight, the best allocation
+    is the heaviest one that fits, so only the set of reachable weights
+    matters. Bit j of a Python int is set when some subset weighs exactly j,
+    and each item is added with a single shift-or, which CPython runs over
+    whole machine words, 30 or 64 budgets at a time [3]. We stop as soon as
+    the capacity itself is reachable.
+
+    Keeping the set after every item would take n * capacity bits, so only
+    every sqrt(n)th set is kept. The allocation is recovered block by block
+    from the last: the sets of a block are recomputed from its checkpoint,
+    and an item is taken when the remaining target weight is not reachable
+    without it. This doubles the running time at most, and holds
+    2 * sqrt(n) sets at once.
+    """
+    weights = instance.weights
+    capacity: int = instance.capacity
+    mask: int = (1 << (capacity + 1)) - 1
+    interval: int = max(1, math.isqrt(len(weights)))
+
+    reach: int = 1
+    checkpoints: list = []
+    processed: int = 0
+    for i in range(len(weights)):
+        if reach >> capacity & 1 or not budget.step():
+            break
+        if i % interval == 0:
+            checkpoints.append(reach)
+        reach |= (reach << weights[i]) & mask
+        processed = i + 1
+
+    target: int = reach.bit_length() - 1
+    allocation: list = []
+    for block in range(len(checkpoints) - 1, -1, -1):
+        start: int = block * interval
+        end: int = min(start + interval, processed)
+        sets: list = __reachable(weights, start, end, checkpoints[block], mask)
+        for i in range(end - 1, start - 1, -1):
+            if not sets[i - start] >> target & 1:
+                allocation.append(i)
+                target -= weights[i]
+
+    value = sum(instance.values[idx] for idx in allocation)
+    return KnapsackAllocation(allocation, value)
+
+
+def __proportional(instance: KnapsackInstance) -> bool:
+    """
+    Whether every value is the same positive multiple of its weight, as in
+    subset sum instances, where values equal weights.
+    """
+    weights = instance.weights
+    values = instance.values
+    if not weights or not isinstance(instance.capacity, int):
+        return False
+    if not all(isinstance(w, int) and w > 0 for w in weights) or not all(isinstance(v, int) for v in values):
+        return False
+    return values[0] > 0 and all(v * weights[0] == w * values[0] for w, v in zip(weights, values))
+
+
+def __select_dtype(instance: KnapsackInstance) -> type:
+    """
+    Picks the smallest NumPy dtype that can hold the sum of all item values,
+    which bounds every entry of the dynamic programming rows. Returns None
+    if the values need arbitrary precision Python integers.
+    """
+    import numpy as np
+    if not all(isinstance(item.value, (int, np.integer)) for item in instance.items):
+        return np.float64
+
+    total_value: int = sum(int(item.value) for item in instance.items)
+    if total_value <= np.iinfo(np.int32).max:
+        return np.int32
+    if total_value <= np.iinfo(np.int64).max:
+        return np.int64
+    return None
+
+
+MEMORY_STRATEGIES = ('auto', 'table', 'bitset', 'hirschberg')
+ENGINES = ('auto', 'python', 'numpy', 'bigint')
+AXES = ('auto', 'capacity', 'value')
+BITSET_MEMORY_LIMIT: int = 2 ** 28  # Bytes allowed for the decision bitset
+
+
+def __dynamic_programming_solver(
+    instance: KnapsackInstance,
+    memory: str,
+    engine: str,
+    axis: str,
+    budget: SolverBudget,
+    stats: dict
+) -> KnapsackAllocation:
+    """
+    Resolves the 'auto' axis, memory strategy and engine for the instance,
+    and runs the matching dynamic programming kernel within the budget.
+    """
+    proportional: bool = __proportional(instance)
+    if engine == 'bigint' and not proportional:
+        raise ValueError('the bigint engine needs positive integer values proportional to the weights')
+    if engine == 'auto' and proportional and axis != 'value' and memory in ('auto', 'bitset'):
+        engine = 'bigint'
+
+    if engine == 'bigint':
+        if stats is not None:
+            stats['axis'] = 'capacity'
+            stats['memory'] = 'checkpoint'
+            stats['engine'] = engine
+            stats['dtype'] = None
+        allocation: KnapsackAllocation = __bigint_solver(instance, budget)
+        if stats is not None:
+            stats['rows'] = budget.iterations
+            stats['cells'] = budget.iterations * (instance.capacity + 1)
+            stats['optimal'] = not budget.exhausted
+            stats['gap'] = linear_relaxation_bound(instance) - allocation.value if budget.exhausted else 0
+        return allocation
+
+    # The capacity axis indexes the rows by weight, so it needs integer
+    # weights and capacity. The value axis needs integer values, and has no
+    # table or divide and conquer strategy, but takes any weights.
+    integer_weights: bool = isinstance(instance.capacity, numbers.Integral) \
+        and all(isinstance(item.weight, numbers.Integral) for item in instance.items)
+    integer_values: bool = all(isinstance(item.value, numbers.Integral) for item in instance.items)
+    total_value: int = sum(int(item.value) for item in instance.items) if integer_values else 0
+    if axis == 'value' and (not integer_values or memory in ('table', 'hirschberg')):
+        raise ValueError('the value axis needs integer values and the bitset memory strategy')
+    if axis == 'capacity' and not integer_weights:
+        raise ValueError('the capacity axis needs integer weights and capacity')
+
+    if axis == 'auto':
+        value_bytes: int = len(instance.items) * ((total_value >> 3) + 1)
+        use_value: bool = integer_values and memory in ('auto', 'bitset') and (
+            not integer_weights
+            or (total_value < instance.capacity and value_bytes <= BITSET_MEMORY_LIMIT)
+        )
+        if not use_value and not integer_weights:
+            raise ValueError('dynamic programming needs integer weights and capacity, or integer values')
+        axis = 'value' if use_value else 'capacity'
+
+    if axis == 'value':
+        memory = 'bitset'
+    elif memory == 'auto':
+        bitset_bytes: int = len(instance.items) * ((instance.capacity >> 3) + 1)
+        memory = 'bitset' if bitset_bytes <= BITSET_MEMORY_LIMIT else 'hirschberg'
+
+    dtype: type = __select_dtype(instance) if engine != 'python' else None
+    if engine == 'numpy' and (dtype is None or memory == 'table'):
+        raise ValueError('the numpy engine needs values that fit in int64 and no full table')
+    if engine == 'auto':
+        engine = 'numpy' if dtype is not None and memory != 'table' else 'python'
+    if engine == 'python':
+        dtype = None
+
+    if stats is not None:
+        stats['axis'] = axis
+        stats['memory'] = memory
+        stats['engine'] = engine
+        stats['dtype'] = dtype.__name__ if dtype is not None else None
+
+    if axis == 'value' and dtype is not None:
+        allocation: KnapsackAllocation = __numpy_value_solver(instance, total_value, budget)
+    elif axis == 'value':
+        allocation: KnapsackAllocation = __value_solver(instance, total_value, budget)
+    elif memory == 'table':
+        allocation: KnapsackAllocation = __table_solver(instance, budget)
+    elif memory == 'bitset' and dtype is not None:
+        allocation: KnapsackAllocation = __numpy_bitset_solver(instance, dtype, budget)
+    elif memory == 'bitset':
+        allocation: KnapsackAllocation = __bitset_solver(instance, budget)
+    else:
+        allocation: KnapsackAllocation = __hirschberg_solver(instance, dtype, budget)
+
+    # If we ran out of time, the linear relaxation bounds how far we may
+    # be from the optimal value.
+    if stats is not None:
+        row_length: int = (total_value if axis == 'value' else instance.capacity) + 1
+        stats['rows'] = budget.iterations
+        stats['cells'] = budget.iterations * row_length
+        stats['optimal'] = not budget.exhausted
+        stats['gap'] = linear_relaxation_bound(instance) - allocation.value if budget.exhausted else 0
+
+    return allocation
+
+
+def dynamic_programming_solver(
+    instance: KnapsackInstance,
+    memory: str = 'auto',
+    engine: str = 'auto',
+    axis: str = 'auto',
+    preprocess: bool = True,
+    time_limit: float = None,
+    max_iterations: int = None,
+    stats: dict = None,
+    callback=None
+) -> KnapsackAllocation:
+    """
+    Solves the instance exactly by dynamic programming. The axis decides what
+    the rows are indexed by: 'capacity' finds the best value for each budget
+    in O(n * capacity), while 'value' finds the minimum weight for each total
+    value in O(n * sum(values)), which suits small integer values with a
+    large capacity. 'auto' picks whichever axis is shorter. Weights or a
+    capacity which are not integers need the value axis, and so integer
+    values, and any other instance raises a ValueError.
+
+    The memory strategy decides how the optimal allocation is recovered:
+
+    * 'table' keeps the full (n + 1) x (capacity + 1) matrix of values.
+    * 'bitset' keeps one row of values and one decision bit per (i, j) pair.
+    * 'hirschberg' keeps two rows at a time and recovers the allocation by
+      divide and conquer.
+    * 'auto' uses 'bitset' while the bits fit in BITSET_MEMORY_LIMIT bytes,
+      and 'hirschberg' otherwise.
+
+    The value axis always uses 'bitset'.
+
+    The engine decides how each row is computed: 'python' loops over the
+    budgets one at a time, while 'numpy' updates the whole row at once in an
+    int32 or int64 array, depending on the sum of the values. 'auto' uses
+    NumPy unless the values overflow int64 or the full table is requested.
+    When every value is the same multiple of its weight, as in subset sum,
+    'auto' picks 'bigint' instead, which only tracks the reachable weights
+    as the bits of a Python int, adds each item with one shift-or, and
+    recovers the allocation from sqrt(n) checkpoints.
+
+    The solve stops early once time_limit seconds have passed or
+    max_iterations rows have been computed, returning the best allocation
+    using only the items processed so far. In that case stats['optimal'] is
+    False and stats['gap'] is the distance to the linear relaxation bound.
+
+    Unless preprocess is False, the instance is first shrunk by
+    reduce_instance(), and the reduction is summarised under
+    stats['reduction'].
+
+    The chosen axis, strategy, engine and dtype are recorded under
+    stats['axis'], stats['memory'], stats['engine'] and stats['dtype'] if a
+    stats dictionary is passed, along with the number of rows and cells
+    computed (at most, for 'hirschberg', whose later rows are shorter), and
+    the time spent in each phase under stats['timings'].
+
+    The allocation is only known once the last row is computed, so
+    callback(value, elapsed) is called once, with the final value.
+    """
+    if memory not in MEMORY_STRATEGIES:
+        raise ValueError(f'memory must be one of {MEMORY_STRATEGIES}, not {memory!r}')
+    if engine not in ENGINES:
+        raise ValueError(f'engine must be one of {ENGINES}, not {engine!r}')
+    if axis not in AXES:
+        raise ValueError(f'axis must be one of {AXES}, not {axis!r}')
+
+    budget: SolverBudget = SolverBudget(time_limit, max_iterations)
+    progress: SolverProgress = SolverProgress(callback)
+
+    if not preprocess:
+        with phase(stats, 'solve'):
+            allocation: KnapsackAllocation = __dynamic_programming_solver(
+                instance, memory, engine, axis, budget, stats
+            )
+        progress.improved(allocation.value)
+        return allocation
+
+    with phase(stats, 'preprocess'):
+        reduction: KnapsackReduction = reduce_instance(instance)
+    if stats is not None:
+        stats['reduction'] = reduction.summary()
+    with phase(stats, 'solve'):
+        allocation: KnapsackAllocation = __dynamic_programming_solver(
+            reduction.instance, memory, engine, axis, budget, stats
+        )
+    allocation = reduction.expand(allocation)
+    progress.improved(allocation.value)
+    return allocation
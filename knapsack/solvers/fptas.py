@@ -0,0 +1,167 @@
+from knapsack import KnapsackInstance, KnapsackAllocation
+from .greedy import ratio_greedy_solver
+from .preprocess import linear_relaxation_bound
+from .progress import SolverProgress, phase
+import math
+
+# References:
+# [1] O. H. Ibarra, C. E. Kim, Fast approximation algorithms for the knapsack and sum of subset problems, 1975.
+# [2] V. V. Vazirani, Approximation Algorithms, Chapter 8, 2001.
+
+
+def __lower_bound(instance: KnapsackInstance, candidates: list) -> KnapsackAllocation:
+    """
+    The better of the ratio greedy allocation and the most valuable single
+    item, which is worth at least half the optimal value.
+    """
+    allocation: KnapsackAllocation = ratio_greedy_solver(instance)
+    values = instance.values
+    if candidates:
+        best: int = max(candidates, key=values.__getitem__)
+        if values[best] > allocation.value:
+            return KnapsackAllocation([best], values[best])
+    return allocation
+
+
+def __scaled_value_solver(
+    instance: KnapsackInstance,
+    candidates: list,
+    scaled: list,
+    max_value: int,
+    stats: dict
+) -> list:
+    """
+    Finds the minimum weight needed to reach each total scaled value up to
+    max_value, one vectorised row update per item, and backtracks from the
+    largest total whose weight fits. No feasible allocation is worth more
+    than max_value, so the row never needs to be any longer.
+    """
+    import numpy as np
+    weights = instance.weights
+    capacity = instance.capacity
+    integer: bool = isinstance(capacity, int) and all(isinstance(weights[idx], int) for idx in candidates)
+    infeasible = capacity + 1 if integer else math.inf
+    row: np.ndarray = np.full(max_value + 1, infeasible, dtype=np.int64 if integer else np.float64)
+    row[0] = 0
+    taken: list = []
+    memory: int = 0
+
+    for idx, value in zip(candidates, scaled):
+        if value == 0 or value > max_value:
+            taken.append(None)
+            continue
+
+        weight_with_item: np.ndarray = row[:max_value + 1 - value] + weights[idx]
+        better: np.ndarray = weight_with_item < row[value:]
+        np.minimum(row[value:], weight_with_item, out=row[value:])
+
+        # Bit k of the packed array is the decision for scaled value value + k.
+        taken.append(np.packbits(better, bitorder='little'))
+        memory += taken[-1].nbytes
+
+    best_value: int = int(np.flatnonzero(row <= capacity)[-1])
+
+    allocation: list = []
+    v: int = best_value
+    for i in range(len(taken) - 1, -1, -1):
+        value: int = scaled[i]
+        if taken[i] is None or v < value:
+            continue
+        k: int = v - value
+        if taken[i][k >> 3] >> (k & 7) & 1:
+            allocation.append(candidates[i])
+            v -= value
+
+    if stats is not None:
+        stats['rows'] = len(candidates)
+        stats['cells'] = len(candidates) * (max_value + 1)
+        stats['memory'] = memory + row.nbytes
+
+    return allocation
+
+
+def fptas_solver(
+    instance: KnapsackInstance,
+    epsilon: float = 0.1,
+    stats: dict = None,
+    callback=None
+) -> KnapsackAllocation:
+    """
+    A fully polynomial-time approximation scheme [1], which returns an
+    allocation worth at least (1 - epsilon) times the optimal value.
+
+    The better of the ratio greedy allocation and the best single item is a
+    lower bound LB of at least half the optimum. Every value is scaled down
+    by K = epsilon * LB / n and rounded down, and the scaled problem is
+    solved exactly by dynamic programming over total scaled value. Rounding
+    loses less than K per item, so less than epsilon * LB <= epsilon * OPT
+    in all [2]. The optimum is at most the linear relaxation bound, which
+    is at most 2 * LB, so the rows need at most 2n / epsilon + 1 entries:
+
+        time:   O(n^2 / epsilon)
+        memory: O(n^2 / epsilon) decision bits, plus one row
+
+    Integer values are never scaled by K < 1, in which case the result is
+    exact. Weights and values may be floats.
+
+    If a stats dictionary is passed, it records epsilon, the scale K, the
+    lower bound, the number of rows and cells computed, the bytes of
+    decision bits and row held under 'memory', and whether the result is
+    proven optimal. 'gap' is the distance to the linear relaxation bound.
+    callback(value, elapsed) is called once, with the final value.
+    """
+    if not 0 < epsilon < 1:
+        raise ValueError(f'epsilon must be in (0, 1), not {epsilon}')
+
+    progress: SolverProgress = SolverProgress(callback)
+    weights = instance.weights
+    values = instance.values
+
+    with phase(stats, 'bound'):
+        # Items which cannot fit, or add nothing, are never worth taking.
+        candidates: list = [
+            idx for idx in range(len(values))
+            if values[idx] > 0 and weights[idx] <= instance.capacity
+        ]
+        greedy: KnapsackAllocation = __lower_bound(instance, candidates)
+        upper_bound = linear_relaxation_bound(instance)
+
+    integer_values: bool = all(isinstance(values[idx], int) for idx in candidates)
+    scale: float = epsilon * greedy.value / len(candidates) if candidates else 1.0
+    exact: bool = integer_values and scale <= 1
+    if exact:
+        scale = 1
+
+    if greedy.value <= 0 or greedy.value >= upper_bound:
+        allocation: KnapsackAllocation = greedy
+        exact = True
+    else:
+        with phase(stats, 'solve'):
+            scaled: list = [int(values[idx] // scale) for idx in candidates]
+            max_value: int = int(min(upper_bound, 2 * greedy.value) // scale)
+            knapsack: list = __scaled_value_solver(instance, candidates, scaled, max_value, stats)
+
+            # Items rounded down to nothing are never chosen, so any room
+            # left is filled greedily, which can only add value.
+            chosen: set = set(knapsack)
+            residual = instance.capacity - sum(weights[idx] for idx in knapsack)
+            for idx in instance.ratio_order:
+                if idx not in chosen and values[idx] > 0 and weights[idx] <= residual:
+                    knapsack.append(idx)
+                    residual -= weights[idx]
+        allocation = KnapsackAllocation(knapsack, sum(values[idx] for idx in knapsack))
+        if greedy.value > allocation.value:
+            allocation = greedy
+
+    if stats is not None:
+        stats.setdefault('rows', 0)
+        stats.setdefault('cells', 0)
+        stats.setdefault('memory', 0)
+        stats['epsilon'] = epsilon
+        stats['scale'] = scale
+        stats['lower_bound'] = greedy.value
+        stats['optimal'] = exact
+        stats['gap'] = 0 if exact else upper_bound - allocation.value
+
+    progress.improved(allocation.value)
+    return allocation
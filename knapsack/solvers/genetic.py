@@ -1,4 +1,7 @@
 from knapsack import KnapsackInstance, KnapsackAllocation
+from .budget import SolverBudget
+from .progress import SolverProgress, phase
+from dataclasses import dataclass
 import random
 
 # TODO: This is a fairly rough initial approach, and it
@@ -9,6 +12,32 @@ import random
 
 # TODO: Add documentation to the functions.
 
+@dataclass
+class Chromosome:
+    """
+    Stores a chromosome in the form e.g. [0, 1, 0, 0, 1, 1, 1], where each
+    index is a binary gene representing one item, along with the total
+    weight and value of the included items. The totals are kept up to date
+    by crossover and mutation, so fitness never has to walk the genes.
+    """
+    genes: list
+    weight: int
+    value: int
+
+
+def __segment_totals(instance: KnapsackInstance, genes: list, start: int, end: int):
+    """
+    Sums the weights and values of the items included by genes[start:end].
+    """
+    weight: int = 0
+    value: int = 0
+    for i in range(start, end):
+        if genes[i]:
+            weight += instance.items[i].weight
+            value += instance.items[i].value
+    return weight, value
+
+
 def __create_population(instance: KnapsackInstance, population_size: int):
     """
     Creates an initial population of population_size chromosomes
@@ -18,55 +47,70 @@ def __create_population(instance: KnapsackInstance, population_size: int):
     """
     population: list = []
     for _ in range(population_size):
-        chromosome: list = [random.randint(0, 1) for _ in range(len(instance.items))]
-        population.append(chromosome)
+        genes: list = [random.randint(0, 1) for _ in range(len(instance.items))]
+        weight, value = __segment_totals(instance, genes, 0, len(genes))
+        population.append(Chromosome(genes, weight, value))
     return population
 
 
-def __fitness(instance: KnapsackInstance, chromosome: list):
-    total_weight: int = 0
-    total_value: int = 0
-
-    for i in range(len(chromosome)):
-        if chromosome[i]:
-            total_weight += instance.items[i].weight
-            total_value += instance.items[i].value
-    
+def __fitness(instance: KnapsackInstance, chromosome: Chromosome):
     # We want to heavily discourage invalid chromosomes
     # because they are not fit for survival.
-    if total_weight > instance.capacity:
-        return -total_value
+    if chromosome.weight > instance.capacity:
+        return -chromosome.value
 
-    return total_value
+    return chromosome.value
 
 
-def __selection(instance: KnapsackInstance, population: list):
+def __selection(instance: KnapsackInstance, population: list, counters: dict):
     tournament_size: int = 2
     selected_parents: list = []
     for _ in range(2):
         tournament: list = random.sample(population, tournament_size)
-        best_chromosome: list = max(tournament, key=lambda chromosome: __fitness(instance, chromosome))
+        best_chromosome: Chromosome = max(tournament, key=lambda chromosome: __fitness(instance, chromosome))
         selected_parents.append(best_chromosome)
+        counters['skipped'] += tournament_size
     return tuple(selected_parents)
 
 
-def __crossover(crossover_rate: float, parent_a: list, parent_b: list):
-    if random.random() > crossover_rate:
+def __crossover(instance: KnapsackInstance, crossover_rate: float, parent_a: Chromosome, parent_b: Chromosome):
+    n_genes: int = len(parent_a.genes)
+    if random.random() > crossover_rate or n_genes < 2:
         return parent_a, parent_b
 
-    crossover_point: int = random.randint(1, len(parent_a) - 1)
-    child_a: list = parent_a[:crossover_point] + parent_b[crossover_point:]
-    child_b: list = parent_b[:crossover_point] + parent_a[crossover_point:]
+    crossover_point: int = random.randint(1, n_genes - 1)
+    child_a: list = parent_a.genes[:crossover_point] + parent_b.genes[crossover_point:]
+    child_b: list = parent_b.genes[:crossover_point] + parent_a.genes[crossover_point:]
+
+    # Each child is one parent with a segment swapped for the other parent's,
+    # so we only sum the shorter of the two segments.
+    if crossover_point <= n_genes - crossover_point:
+        weight_a, value_a = __segment_totals(instance, parent_a.genes, 0, crossover_point)
+        weight_b, value_b = __segment_totals(instance, parent_b.genes, 0, crossover_point)
+        return (
+            Chromosome(child_a, parent_b.weight - weight_b + weight_a, parent_b.value - value_b + value_a),
+            Chromosome(child_b, parent_a.weight - weight_a + weight_b, parent_a.value - value_a + value_b)
+        )
 
-    return child_a, child_b
+    weight_a, value_a = __segment_totals(instance, parent_a.genes, crossover_point, n_genes)
+    weight_b, value_b = __segment_totals(instance, parent_b.genes, crossover_point, n_genes)
+    return (
+        Chromosome(child_a, parent_a.weight - weight_a + weight_b, parent_a.value - value_a + value_b),
+        Chromosome(child_b, parent_b.weight - weight_b + weight_a, parent_b.value - value_b + value_a)
+    )
 
 
-def __mutation(mutation_rate: float, chromosome: list):
+def __mutation(instance: KnapsackInstance, mutation_rate: float, chromosome: Chromosome):
     if random.random() > mutation_rate:
         return chromosome
 
-    mutation_point: int = random.randint(0, len(chromosome) - 1)
-    chromosome[mutation_point] = 1 - chromosome[mutation_point]
+    mutation_point: int = random.randint(0, len(chromosome.genes) - 1)
+    chromosome.genes[mutation_point] = 1 - chromosome.genes[mutation_point]
+
+    # Only the flipped gene changes the totals.
+    sign: int = 1 if chromosome.genes[mutation_point] else -1
+    chromosome.weight += sign * instance.items[mutation_point].weight
+    chromosome.value += sign * instance.items[mutation_point].value
     return chromosome
 
 
@@ -75,50 +119,261 @@ def __genetic_algorithm_solver(
     population_size: int,
     mutation_rate: int,
     crossover_rate: int,
-    num_generations: int
+    num_generations: int,
+    budget: SolverBudget,
+    progress: SolverProgress,
+    stats: dict
 ):
-    
+    # Count the fitness lookups answered from the cached totals, each of
+    # which would otherwise have walked every gene. Only the lookups that a
+    # search without cached totals makes are counted: the tournaments, and
+    # picking the fittest chromosome of the last generation.
+    counters: dict = {'skipped': 0}
+    history: list = []
+
+    # The fittest chromosome of any generation is kept, since crossover and
+    # mutation may lose it. Its genes are copied, because mutation changes
+    # chromosomes in place.
+    best_genes: list = []
+    best_fitness: int = None
+
+    def record(population: list):
+        nonlocal best_genes, best_fitness
+        fittest: Chromosome = max(population, key=lambda chromosome: __fitness(instance, chromosome))
+        fitness: int = __fitness(instance, fittest)
+        if best_fitness is None or fitness > best_fitness:
+            best_genes, best_fitness = fittest.genes[:], fitness
+            progress.improved(best_fitness)
+        if stats is not None:
+            history.append(fitness)
+
     # Initial population
     population: list = __create_population(instance, population_size)
+    record(population)
 
-    # Generate offspring num_generations times
+    # Generate offspring num_generations times, or until the budget
+    # runs out
     for _ in range(num_generations):
+        if not budget.step():
+            break
+
         offspring: list = []
-        best_chromosome: list = []
         
         # The offspring population must be of population_size
         while len(offspring) < len(population):
             
             # Select two parents based on fitness values
-            parent_a, parent_b = __selection(instance, population)
-            child_a, child_b = __crossover(crossover_rate, parent_a, parent_b)
+            parent_a, parent_b = __selection(instance, population, counters)
+            child_a, child_b = __crossover(instance, crossover_rate, parent_a, parent_b)
 
-            child_a = __mutation(mutation_rate, child_a)
-            child_b = __mutation(mutation_rate, child_b)
+            child_a = __mutation(instance, mutation_rate, child_a)
+            child_b = __mutation(instance, mutation_rate, child_b)
 
             offspring.append(child_a)
             offspring.append(child_b)
         
         population = offspring
-    
-    best_chromosome: list = max(population, key=lambda chromosome: __fitness(instance, chromosome))
-    best_fitness: int = __fitness(instance, best_chromosome)
+        record(population)
+
+    # record() picks the fittest chromosome of every generation, which the
+    # search without cached totals only did for the last one.
+    counters['skipped'] += len(population) + 1
 
-    allocation: list = [idx for idx, gene in enumerate(best_chromosome) if gene]
+    if stats is not None:
+        stats['fitness_evaluations_skipped'] = counters['skipped']
+        stats['best_fitness'] = history
+
+    allocation: list = [idx for idx, gene in enumerate(best_genes) if gene]
     return KnapsackAllocation(allocation, best_fitness)
 
 
+def __numpy_fitness(population: 'np.ndarray', weights_values: 'np.ndarray', capacity: int):
+    """
+    Computes the fitness of every chromosome at once, by multiplying the
+    population matrix with the (n_items, 2) matrix of weights and values.
+    The product converts the uint8 genes to the dtype of the weights and
+    values, which is eight times larger, so it runs over blocks of about
+    FITNESS_BLOCK genes to bound the converted copy. Invalid chromosomes
+    are discouraged in the same way as in __fitness.
+    """
+    import numpy as np
+    rows: int = max(1, FITNESS_BLOCK // max(1, population.shape[1]))
+    totals: np.ndarray = np.empty((population.shape[0], 2), dtype=weights_values.dtype)
+    for start in range(0, population.shape[0], rows):
+        totals[start:start + rows] = population[start:start + rows] @ weights_values
+    return np.where(totals[:, 0] > capacity, -totals[:, 1], totals[:, 1])
+
+
+def __select_dtype(weights: list, values: list) -> type:
+    """
+    Picks a dtype for the matrix of weights and values which holds every
+    total exactly: int64 for integers whose sums fit, float64 if any weight
+    or value is not an integer, and Python objects for larger integers.
+    """
+    import numpy as np
+    integer: bool = all(isinstance(element, (int, np.integer)) for element in (*weights, *values))
+    largest: int = max(sum(abs(int(w)) for w in weights if isinstance(w, (int, np.integer))),
+                       sum(abs(int(v)) for v in values if isinstance(v, (int, np.integer))))
+    if not integer:
+        # Floats only hold integers exactly up to 2^53.
+        return np.float64 if largest < 2 ** 53 else object
+    return np.int64 if largest <= np.iinfo(np.int64).max else object
+
+
+def __numpy_genetic_algorithm_solver(
+    instance: KnapsackInstance,
+    population_size: int,
+    mutation_rate: int,
+    crossover_rate: int,
+    num_generations: int,
+    budget: SolverBudget,
+    progress: SolverProgress,
+    stats: dict
+):
+    """
+    The same algorithm as __genetic_algorithm_solver, except the population
+    is a (population_size, n_items) matrix of genes, so each generation is a
+    handful of array operations: fitness is two matrix-vector products, the
+    tournaments compare two random rows per parent, one-point crossover
+    picks between the parents with a mask per pair of rows, and mutation
+    flips one gene in a random subset of rows.
+    """
+    # NumPy is only imported by this engine.
+    import numpy as np
+    rng: np.random.Generator = np.random.default_rng(random.getrandbits(64))
+    n_items: int = len(instance.items)
+    weights: list = list(instance.weights)
+    values: list = list(instance.values)
+    weights_values: np.ndarray = np.array(
+        [weights, values], dtype=__select_dtype(weights, values)
+    ).T.reshape(n_items, 2)
+    # Integer values are reported as integers, whatever the matrix dtype.
+    integer_values: bool = all(isinstance(value, (int, np.integer)) for value in values)
+    genes: np.ndarray = np.arange(n_items)
+
+    # Offspring are produced in pairs, so an odd population is rounded up
+    # for crossover and then trimmed.
+    num_pairs: int = (population_size + 1) // 2
+
+    # Initial population
+    population: np.ndarray = rng.integers(0, 2, size=(population_size, n_items), dtype=np.uint8)
+
+    # As in __genetic_algorithm_solver, the fittest chromosome of any
+    # generation is kept.
+    history: list = []
+    best_genes: np.ndarray = None
+    best_fitness: int = None
+
+    def record(fitness: np.ndarray):
+        nonlocal best_genes, best_fitness
+        fittest: int = int(np.argmax(fitness))
+        value = int(fitness[fittest]) if integer_values else float(fitness[fittest])
+        if best_fitness is None or value > best_fitness:
+            best_genes, best_fitness = population[fittest].copy(), value
+            progress.improved(best_fitness)
+        if stats is not None:
+            history.append(value)
+
+    for _ in range(num_generations):
+        if not budget.step():
+            break
+
+        fitness: np.ndarray = __numpy_fitness(population, weights_values, instance.capacity)
+        record(fitness)
+
+        # Each parent wins a tournament between two distinct chromosomes.
+        contender_a: np.ndarray = rng.integers(0, population_size, size=2 * num_pairs)
+        contender_b: np.ndarray = contender_a
+        if population_size > 1:
+            offset: np.ndarray = rng.integers(1, population_size, size=2 * num_pairs)
+            contender_b = (contender_a + offset) % population_size
+        winners: np.ndarray = np.where(
+            fitness[contender_a] >= fitness[contender_b], contender_a, contender_b
+        )
+        parent_a: np.ndarray = population[winners[:num_pairs]]
+        parent_b: np.ndarray = population[winners[num_pairs:]]
+
+        # Genes before the crossover point come from the first parent. Pairs
+        # that do not cross over keep every gene from their own parent.
+        if n_items > 1:
+            points: np.ndarray = rng.integers(1, n_items, size=num_pairs)
+        else:
+            points: np.ndarray = np.full(num_pairs, n_items)
+        points[rng.random(num_pairs) > crossover_rate] = n_items
+        mask: np.ndarray = genes < points[:, None]
+
+        population = np.concatenate((
+            np.where(mask, parent_a, parent_b),
+            np.where(mask, parent_b, parent_a)
+        ))[:population_size]
+
+        # Flip one random gene in each mutated chromosome.
+        mutated: np.ndarray = np.flatnonzero(rng.random(population_size) <= mutation_rate)
+        population[mutated, rng.integers(0, n_items, size=len(mutated))] ^= 1
+
+    record(__numpy_fitness(population, weights_values, instance.capacity))
+    if stats is not None:
+        stats['best_fitness'] = history
+
+    allocation: list = np.flatnonzero(best_genes).tolist()
+    return KnapsackAllocation(allocation, best_fitness)
+
+
+ENGINES = ('python', 'numpy')
 POPULATION_SIZE = 100
 MUTATION_RATE = 0.3
 CROSSOVER_RATE = 0.8
 NUM_GENERATIONS = 250
+FITNESS_BLOCK: int = 2 ** 20  # Genes converted at once to compute fitness
 
 
-def genetic_algorithm_solver(instance: KnapsackInstance):
-    return __genetic_algorithm_solver(
-        instance,
-        POPULATION_SIZE,
-        MUTATION_RATE,
-        CROSSOVER_RATE,
-        NUM_GENERATIONS
-    )
+def genetic_algorithm_solver(
+    instance: KnapsackInstance,
+    time_limit: float = None,
+    max_iterations: int = None,
+    engine: str = 'numpy',
+    stats: dict = None,
+    callback=None
+):
+    """
+    Evolves a population of random allocations for NUM_GENERATIONS
+    generations, or until time_limit seconds or max_iterations generations
+    have passed, and returns the fittest allocation of any generation. The
+    result is never proven optimal, which is recorded under stats['optimal']
+    if a stats dictionary is passed. The fitness of the fittest chromosome
+    in each generation is recorded under stats['best_fitness'] to show how
+    the population converged, along with the time spent evolving, and
+    callback(value, elapsed) is called whenever the fittest allocation so
+    far improves.
+
+    The 'numpy' engine stores the population as a matrix and evolves it
+    with batched array operations, while the 'python' engine stores each
+    chromosome as a list with cached totals, and records how many full
+    fitness evaluations the cache saved under
+    stats['fitness_evaluations_skipped'].
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'engine must be one of {ENGINES}, not {engine!r}')
+
+    budget: SolverBudget = SolverBudget(time_limit, max_iterations)
+    progress: SolverProgress = SolverProgress(callback)
+    solver = __numpy_genetic_algorithm_solver if engine == 'numpy' else __genetic_algorithm_solver
+    with phase(stats, 'evolve'):
+        allocation: KnapsackAllocation = solver(
+            instance,
+            POPULATION_SIZE,
+            MUTATION_RATE,
+            CROSSOVER_RATE,
+            NUM_GENERATIONS,
+            budget,
+            progress,
+            stats
+        )
+
+    if stats is not None:
+        stats['optimal'] = False
+        stats['gap'] = None
+        stats['iterations'] = budget.iterations
+        stats['incumbent_updates'] = progress.improvements
+
+    return allocation
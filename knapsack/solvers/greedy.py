@@ -1,51 +1,101 @@
 from knapsack import KnapsackInstance, KnapsackAllocation
+from .progress import SolverProgress, phase
 
+LINEAR_THRESHOLD: int = 4096  # Items from which the critical item is found by partitioning
 
-def __run_greedy(instance: KnapsackInstance, items: list) -> KnapsackAllocation:
+
+def __run_greedy(instance: KnapsackInstance, order: list) -> KnapsackAllocation:
     """
-    Runs the greedy algorithm on a sorted list of items, and returns the
-    best allocation and value found.
+    Runs the greedy algorithm over the item indices in the given order, and
+    returns the best allocation and value found.
     """
+    weights = instance.weights
+    values = instance.values
     capacity: int = instance.capacity
     allocation: list = []
     value: int = 0
     iterator: int = 0
     # We iterate through candidate items until we have exhausted 
     # all of them, or we have exhausted the budget.
-    while 0 < capacity and iterator < len(items):
-        cand: tuple = items[iterator]
+    while 0 < capacity and iterator < len(order):
+        pid: int = order[iterator]
         # If the capacity can hold this item, then include it in the result.
         # Otherwise, we simply skip this item and try the next one.
-        if cand[1].weight <= capacity:
-            allocation.append(cand[0])
-            value += cand[1].value
-            capacity -= cand[1].weight
+        if weights[pid] <= capacity:
+            allocation.append(pid)
+            value += values[pid]
+            capacity -= weights[pid]
         iterator += 1
     
     return KnapsackAllocation(allocation, value)
 
 
-def ratio_greedy_solver(instance: KnapsackInstance) -> KnapsackAllocation:
+def __finish(allocation: KnapsackAllocation, progress: SolverProgress, stats: dict) -> KnapsackAllocation:
+    """
+    Records the stats shared by both greedy solvers, and reports the value.
+    """
+    if stats is not None:
+        stats['optimal'] = False
+        stats['gap'] = None
+        stats['items_taken'] = len(allocation.knapsack)
+    progress.improved(allocation.value)
+    return allocation
+
+
+def ratio_greedy_solver(instance: KnapsackInstance, stats: dict = None, callback=None) -> KnapsackAllocation:
     """
     A very fast and relatively accurate approximation scheme for the knapsack
     problem which computes the value-weight ratio for each item, sorts by
     this ratio in descending order and greedily chooses the items with
-    the highest ratio until the budget is exhausted.
+    the highest ratio until the budget is exhausted. A KnapsackArrayInstance
+    caches the sorted order, so repeated calls skip the sort.
+
+    Instances with LINEAR_THRESHOLD items or more are not sorted. The items
+    before the critical item are found by partitioning in O(n), and the
+    fill carries on over the few items light enough to fit after it, so
+    the same items are taken, though not listed in ratio order.
+
+    The result is never proven optimal. If a stats dictionary is passed, it
+    records the number of items taken and the time spent sorting (or
+    partitioning) and filling the knapsack, and callback(value, elapsed) is
+    called once with the final value.
     """
-    items: list = [(pid, cand, cand.value/cand.weight) for pid, cand in enumerate(instance.items)]
-    items: list = sorted(items, key=lambda t: t[2], reverse=True)
+    progress: SolverProgress = SolverProgress(callback)
+    weights = instance.weights
+    if len(weights) < LINEAR_THRESHOLD or instance.capacity <= 0:
+        with phase(stats, 'sort'):
+            order: list = instance.ratio_order
+        with phase(stats, 'fill'):
+            allocation: KnapsackAllocation = __run_greedy(instance, order)
+        return __finish(allocation, progress, stats)
+
+    # NumPy is only imported once an instance is large enough to need it.
+    from .critical import CriticalItem, critical_item, greedy_fill, sum_values
+    import numpy as np
+
+    values = instance.values
+    with phase(stats, 'partition'):
+        critical: CriticalItem = critical_item(weights, values, instance.capacity)
+    with phase(stats, 'fill'):
+        fill: list = greedy_fill(weights, values, critical)
+        knapsack: np.ndarray = np.concatenate((critical.taken, np.array(fill, dtype=np.int64)))
+        allocation: KnapsackAllocation = KnapsackAllocation(knapsack.tolist(), sum_values(values, knapsack))
 
-    return __run_greedy(instance, items)
+    return __finish(allocation, progress, stats)
 
 
-def greedy_solver(instance: KnapsackInstance) -> KnapsackAllocation:
+def greedy_solver(instance: KnapsackInstance, stats: dict = None, callback=None) -> KnapsackAllocation:
     """
     A very fast and relatively accurate approximation scheme for the knapsack
     problem which sorts by the value in descending order and greedily chooses
-    the items with the highest values until the budget is exhausted.
+    the items with the highest values until the budget is exhausted. The
+    stats and callback are as for ratio_greedy_solver().
     """
-    items: list = [(pid, cand) for pid, cand in enumerate(instance.items)]
-    items: list = sorted(items, key=lambda t: t[1].value, reverse=True)
+    progress: SolverProgress = SolverProgress(callback)
+    with phase(stats, 'sort'):
+        values = instance.values
+        order: list = sorted(range(len(values)), key=lambda pid: values[pid], reverse=True)
+    with phase(stats, 'fill'):
+        allocation: KnapsackAllocation = __run_greedy(instance, order)
 
-    return __run_greedy(instance, items)
-        
+    return __finish(allocation, progress, stats)
@@ -0,0 +1,267 @@
+from knapsack import KnapsackInstance, KnapsackArrayInstance, KnapsackAllocation, KnapsackItem
+from .greedy import LINEAR_THRESHOLD
+from dataclasses import dataclass
+from math import gcd
+import heapq
+import numbers
+
+# References:
+# [1] R. S. Dembo, P. L. Hammer, A reduction algorithm for knapsack problems, 1980.
+# [2] S. Martello, P. Toth, Knapsack Problems: Algorithms and Computer Implementations, 1990.
+
+
+@dataclass
+class KnapsackReduction:
+    """
+    Stores a reduced knapsack instance along with everything required to map
+    an allocation for it back onto the original instance. Items which were
+    proven to be in every optimal allocation are kept in fixed, and are not
+    part of the reduced instance.
+    """
+    instance: KnapsackInstance  # The reduced instance passed to a solver
+    indices: list  # The original index of each item in the reduced instance
+    fixed: list  # Original indices of items fixed into the knapsack
+    fixed_value: int  # The total value of the fixed items
+    divisor: int  # The GCD the weights and capacity were divided by
+    original_items: int
+    original_capacity: int
+    removed_heavy: int  # Items heavier than the (remaining) capacity
+    removed_dominated: int  # Items dominated by enough lighter, better items
+    fixed_out: int  # Items proven to be in no optimal allocation by the bound
+
+    def expand(self, allocation: KnapsackAllocation) -> KnapsackAllocation:
+        """
+        Maps an allocation for the reduced instance back onto the original
+        item indices, and adds the items that were fixed into the knapsack.
+        """
+        knapsack: list = [self.indices[idx] for idx in allocation.knapsack] + self.fixed
+        return KnapsackAllocation(knapsack, allocation.value + self.fixed_value)
+
+    def summary(self) -> dict:
+        """
+        Reports how much the reduction shrank the problem.
+        """
+        return {
+            'items': (self.original_items, len(self.instance.items)),
+            'capacity': (self.original_capacity, self.instance.capacity),
+            'divisor': self.divisor,
+            'removed_heavy': self.removed_heavy,
+            'removed_dominated': self.removed_dominated,
+            'fixed_in': len(self.fixed),
+            'fixed_out': self.fixed_out
+        }
+
+
+def __fix_by_bound(items: list, capacity: int) -> tuple:
+    """
+    Finds the break item, i.e., the first item which does not fit when
+    greedily filling the knapsack in value-weight ratio order, which takes
+    O(n) time by partitioning for large instances. With r the ratio of the
+    break item, every allocation is worth at most
+    r * capacity + sum(max(0, v_i - r * w_i)), which is the linear
+    relaxation bound. An allocation that leaves out an item with
+    v_j > r * w_j, or includes an item with v_j < r * w_j, is worth at least
+    |v_j - r * w_j| less than that. If the result drops below a known
+    feasible value, then no optimal allocation can do so.
+
+    Returns the items fixed in, the items fixed out and the free items. All
+    arithmetic is scaled by the break item weight to keep it exact, which
+    needs integer values, weights and capacity, so nothing is fixed
+    otherwise.
+    """
+    if not isinstance(capacity, numbers.Integral) or not all(
+        isinstance(item.value, int) and isinstance(item.weight, numbers.Integral) for _, item in items
+    ):
+        return [], [], items
+
+    weights: list = [item.weight for _, item in items]
+    values: list = [item.value for _, item in items]
+    if len(items) >= LINEAR_THRESHOLD:
+        from .critical import CriticalItem, critical_item, greedy_fill
+        critical: CriticalItem = critical_item(weights, values, capacity)
+        break_idx: int = critical.index
+        greedy: list = [] if break_idx is None else critical.taken.tolist() + greedy_fill(weights, values, critical)
+    else:
+        order: list = sorted(range(len(items)), key=lambda k: values[k] / weights[k], reverse=True)
+        residual: int = capacity
+        break_idx: int = None
+        greedy: list = []
+        for k in order:
+            if weights[k] <= residual:
+                greedy.append(k)
+                residual -= weights[k]
+            elif break_idx is None:
+                break_idx = k
+
+    # Everything fits, so everything is in the knapsack.
+    if break_idx is None:
+        return items, [], []
+
+    # The greedy fill and the best single item are both feasible, so the
+    # better of them is a lower bound on the optimal value.
+    lower_bound: int = max(sum(values[k] for k in greedy), max(values))
+
+    break_item: KnapsackItem = items[break_idx][1]
+    reduced_costs: list = [
+        item.value * break_item.weight - break_item.value * item.weight
+        for _, item in items
+    ]
+    scaled_bound: int = capacity * break_item.value + sum(c for c in reduced_costs if c > 0)
+
+    fixed_in: list = []
+    fixed_out: list = []
+    free: list = []
+    for (pid, item), reduced_cost in zip(items, reduced_costs):
+        if reduced_cost == 0 or (scaled_bound - abs(reduced_cost)) // break_item.weight >= lower_bound:
+            free.append((pid, item))
+        elif reduced_cost > 0:
+            fixed_in.append((pid, item))
+        else:
+            fixed_out.append((pid, item))
+
+    return fixed_in, fixed_out, free
+
+
+def __remove_dominated(items: list, capacity: int) -> list:
+    """
+    An item j is dominated by an item i if w_i <= w_j and v_i >= v_j. Unlike
+    the unbounded problem, a single dominating item is not enough, since the
+    optimal allocation may contain both. But if at most k items fit in the
+    knapsack at once, and j is dominated by at least k items, then any
+    allocation with j leaves out one of them, which can be swapped in for
+    j. Such items are removed. Items are ordered by weight and then by
+    value, so we only need the k largest values seen so far.
+    """
+    count: int = 0
+    weight: int = 0
+    for w in sorted(item.weight for _, item in items):
+        if weight + w > capacity:
+            break
+        weight += w
+        count += 1
+
+    if count == 0:
+        return []
+
+    kept: list = []
+    best_values: list = []  # A min-heap of the count largest values seen
+    for pid, item in sorted(items, key=lambda i: (i[1].weight, -i[1].value)):
+        if len(best_values) == count and best_values[0] >= item.value:
+            continue
+        kept.append((pid, item))
+        if len(best_values) < count:
+            heapq.heappush(best_values, item.value)
+        else:
+            heapq.heappushpop(best_values, item.value)
+
+    return kept
+
+
+def linear_relaxation_bound(instance: KnapsackInstance) -> float:
+    """
+    Solves the fractional knapsack problem, where items may be partially
+    included, by greedily adding items in descending value-weight ratio and
+    then as much of the first item that does not fit as possible. This is
+    an upper bound on the optimal value of the binary problem.
+    """
+    weights = instance.weights
+    values = instance.values
+
+    # Large instances find the break item in O(n) instead of sorting. Items
+    # without value come after every valuable one in ratio order, so they
+    # only count towards the bound if they break it.
+    if len(weights) >= LINEAR_THRESHOLD:
+        from .critical import CriticalItem, critical_item, sum_values
+        critical: CriticalItem = critical_item(weights, values, instance.capacity)
+        value_bound = sum_values(values, critical.taken, positive=True)
+        if critical.index is not None and values[critical.index] > 0:
+            value_bound += critical.residual * values[critical.index] / weights[critical.index]
+        return value_bound
+
+    value_bound = 0
+    residual: int = instance.capacity
+    for idx in instance.ratio_order:
+        if values[idx] <= 0:
+            continue
+        if weights[idx] > residual:
+            return value_bound + residual * values[idx] / weights[idx]
+        value_bound += values[idx]
+        residual -= weights[idx]
+
+    return value_bound
+
+
+def reduce_instance(instance: KnapsackInstance) -> KnapsackReduction:
+    """
+    Shrinks an instance before it is solved exactly, without changing its
+    optimal value. Items heavier than the capacity are dropped, items are
+    fixed in or out where the linear relaxation bound proves it, dominated
+    items are removed, and finally the weights and capacity are divided by
+    the GCD of the weights. Solve the reduced instance and pass the result
+    to expand() to obtain an allocation for the original instance.
+    """
+    capacity: int = instance.capacity
+    fixed: list = []
+    items: list = []
+    removed_heavy: int = 0
+    fixed_out: int = 0
+
+    for pid, item in enumerate(instance.items):
+        if item.value <= 0:
+            fixed_out += 1
+        elif item.weight <= 0:
+            fixed.append((pid, item))
+        elif item.weight > capacity:
+            removed_heavy += 1
+        else:
+            items.append((pid, item))
+
+    fixed_in, out, items = __fix_by_bound(items, capacity)
+    fixed += fixed_in
+    fixed_out += len(out)
+    capacity -= sum(item.weight for _, item in fixed)
+
+    # Fixing items reduces the capacity, so more items may be too heavy.
+    num_items: int = len(items)
+    items = [(pid, item) for pid, item in items if item.weight <= capacity]
+    removed_heavy += num_items - len(items)
+
+    num_items = len(items)
+    items = __remove_dominated(items, capacity)
+    removed_dominated: int = num_items - len(items)
+
+    # The total weight of any allocation is a multiple of the GCD, so it
+    # fits in the capacity if and only if it fits in the rounded down
+    # multiple of the GCD. Non-integer weights have no GCD, so they and the
+    # capacity are left as they are.
+    items.sort()
+    weights: list = [item.weight for _, item in items]
+    divisor: int = 1
+    if all(isinstance(weight, numbers.Integral) for weight in weights):
+        divisor = 0
+        for weight in weights:
+            divisor = gcd(divisor, weight)
+        divisor = max(divisor, 1)
+        capacity //= divisor
+        weights = [weight // divisor for weight in weights]
+
+    # The reduced instance is array-backed, so that the solvers share its
+    # cached ratio order and prefix sums.
+    reduced: KnapsackArrayInstance = KnapsackArrayInstance(
+        capacity,
+        weights,
+        [item.value for _, item in items]
+    )
+
+    return KnapsackReduction(
+        reduced,
+        [pid for pid, _ in items],
+        [pid for pid, _ in fixed],
+        sum(item.value for _, item in fixed),
+        divisor,
+        len(instance.items),
+        instance.capacity,
+        removed_heavy,
+        removed_dominated,
+        fixed_out
+    )
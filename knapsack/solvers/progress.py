@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+import time
+
+
+class SolverProgress:
+    """
+    Reports each improvement of a solver's incumbent to an optional
+    callback, as callback(value, elapsed), where elapsed is the number of
+    seconds since the solve started. The offset is added to every value, so
+    that a solver working on a reduced instance reports values for the
+    original one. Without a callback, improved() returns immediately, and
+    solvers only call it when the incumbent changes.
+    """
+    def __init__(self, callback=None, offset: int = 0):
+        self.callback = callback
+        self.offset: int = offset
+        self.start: float = time.perf_counter()
+        self.improvements: int = 0
+
+    def improved(self, value):
+        self.improvements += 1
+        if self.callback is not None:
+            self.callback(value + self.offset, time.perf_counter() - self.start)
+
+
+@contextmanager
+def phase(stats: dict, name: str):
+    """
+    Adds the time spent in the block to stats['timings'][name], or does
+    nothing if stats is None.
+    """
+    if stats is None:
+        yield
+        return
+
+    start: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings: dict = stats.setdefault('timings', {})
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
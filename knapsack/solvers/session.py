@@ -0,0 +1,247 @@
+from knapsack import KnapsackInstance, KnapsackArrayInstance, KnapsackAllocation
+from .branch_bound import branch_and_bound_solver
+from .sim_anneal import simulated_annealing_solver
+from .preprocess import linear_relaxation_bound
+from .budget import SolverBudget
+from .progress import SolverProgress, phase
+import numbers
+
+METHODS = ('dynamic_programming', 'branch_and_bound', 'simulated_annealing')
+CHECKPOINT_INTERVAL: int = 64  # Items between the rows kept for re-solving
+
+
+class KnapsackSession:
+    """
+    Holds an instance which is edited and re-solved many times, and keeps
+    the work of each solve to make the next one cheaper.
+
+    The dynamic programming rows are computed item by item, in the order
+    of the items, and only the decision bits of each item, the last row, and
+    a copy of the row every CHECKPOINT_INTERVAL items are kept. An edit to
+    item i only invalidates the rows from i onwards, so a re-solve restarts
+    from the last checkpoint before i: appending an item costs one new row,
+    and editing or removing one costs at most the rows after the checkpoint.
+    Row j only depends on the budgets up to j, so lowering the capacity
+    reuses every row, and only raising it past the capacity the rows were
+    computed for starts again from scratch.
+
+    Branch and bound and simulated annealing are warm-started from the
+    previous optimum, which is carried through each edit: removed items
+    leave it, and items are dropped, worst value-weight ratio first, until
+    it fits again after an item grows or the capacity shrinks.
+
+    Weights and the capacity must be non-negative integers.
+    """
+    def __init__(self, instance: KnapsackInstance, checkpoint_interval: int = CHECKPOINT_INTERVAL):
+        if checkpoint_interval < 1:
+            raise ValueError(f'checkpoint_interval must be at least 1, not {checkpoint_interval}')
+
+        self.checkpoint_interval: int = checkpoint_interval
+        self.weights: list = []
+        self.values: list = []
+        self.capacity: int = self.__check_weight(instance.capacity, 'capacity')
+        for weight, value in zip(instance.weights, instance.values):
+            self.weights.append(self.__check_weight(weight, 'weights'))
+            self.values.append(value)
+
+        # The previous optimum, as item indices, kept feasible across edits.
+        self.allocation: list = []
+
+        self.__dtype: type = None
+        self.__row_capacity: int = self.capacity
+        self.__row: 'np.ndarray' = None
+        self.__bits: list = []  # Packed decision bits for each valid item
+        self.__checkpoints: dict = {}  # Item index -> copy of the row before it
+        self.__valid: int = 0  # Items whose rows are up to date
+
+    @staticmethod
+    def __check_weight(weight, name: str) -> int:
+        if not isinstance(weight, numbers.Integral) or weight < 0:
+            raise ValueError(f'{name} must be non-negative integers, not {weight!r}')
+        return int(weight)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    @property
+    def instance(self) -> KnapsackArrayInstance:
+        return KnapsackArrayInstance(self.capacity, self.weights, self.values)
+
+    def __invalidate(self, idx: int):
+        """
+        Marks the rows from item idx onwards as stale, and rewinds to the
+        last checkpoint at or before idx.
+        """
+        if idx >= self.__valid and idx > 0:
+            return
+
+        checkpoint: int = idx - idx % self.checkpoint_interval
+        self.__row = self.__checkpoints[checkpoint].copy() if checkpoint > 0 else None
+        del self.__bits[checkpoint:]
+        for key in [key for key in self.__checkpoints if key > checkpoint]:
+            del self.__checkpoints[key]
+        self.__valid = checkpoint
+
+    def __repair(self):
+        """
+        Drops items from the previous optimum, worst value-weight ratio
+        first, until it fits in the knapsack.
+        """
+        weight: int = sum(self.weights[idx] for idx in self.allocation)
+        if weight <= self.capacity:
+            return
+
+        by_ratio: list = sorted(
+            self.allocation,
+            key=lambda idx: self.values[idx] / self.weights[idx] if self.weights[idx] else float('inf')
+        )
+        while weight > self.capacity:
+            idx: int = by_ratio.pop(0)
+            weight -= self.weights[idx]
+        self.allocation = sorted(by_ratio)
+
+    def add_item(self, weight: int, value) -> int:
+        """
+        Appends an item, and returns its index.
+        """
+        self.weights.append(self.__check_weight(weight, 'weights'))
+        self.values.append(value)
+        return len(self.weights) - 1
+
+    def remove_item(self, idx: int):
+        """
+        Removes the item at idx, such that the items after it move down one
+        index, as with list.pop().
+        """
+        idx = range(len(self.weights))[idx]
+        self.__invalidate(idx)
+        del self.weights[idx]
+        del self.values[idx]
+        self.allocation = [i - (i > idx) for i in self.allocation if i != idx]
+
+    def update_item(self, idx: int, weight: int = None, value=None):
+        """
+        Changes the weight and/or value of the item at idx.
+        """
+        idx = range(len(self.weights))[idx]
+        if weight is not None:
+            self.weights[idx] = self.__check_weight(weight, 'weights')
+        if value is not None:
+            self.values[idx] = value
+        self.__invalidate(idx)
+        self.__repair()
+
+    def set_capacity(self, capacity: int):
+        self.capacity = self.__check_weight(capacity, 'capacity')
+        if self.capacity > self.__row_capacity:
+            self.__row_capacity = self.capacity
+            self.__invalidate(0)
+        self.__repair()
+
+    def __extend(self, budget: SolverBudget) -> int:
+        """
+        Computes the stale rows from the last valid one, stopping early if
+        the budget runs out, and returns the number of rows computed.
+        """
+        import numpy as np
+        # Values which stop fitting the dtype of the rows start them again.
+        if all(isinstance(value, (int, np.integer)) for value in self.values):
+            dtype: type = np.int64 if sum(map(abs, self.values)) <= np.iinfo(np.int64).max else object
+        else:
+            dtype: type = np.float64
+        if dtype is not self.__dtype:
+            self.__dtype = dtype
+            self.__invalidate(0)
+
+        capacity: int = self.__row_capacity
+        if self.__row is None:
+            self.__row = np.zeros(capacity + 1, dtype=dtype)
+
+        row: np.ndarray = self.__row
+        computed: int = 0
+        for i in range(self.__valid, len(self.weights)):
+            if not budget.step():
+                break
+
+            if i % self.checkpoint_interval == 0 and i > 0:
+                self.__checkpoints[i] = row.copy()
+
+            weight: int = self.weights[i]
+            if weight > capacity:
+                self.__bits.append(None)
+            else:
+                value_with_item: np.ndarray = row[:capacity + 1 - weight] + self.values[i]
+                better: np.ndarray = value_with_item > row[weight:]
+                np.maximum(row[weight:], value_with_item, out=row[weight:])
+                self.__bits.append(np.packbits(better, bitorder='little'))
+            self.__valid = i + 1
+            computed += 1
+        return computed
+
+    def __dynamic_programming(self, budget: SolverBudget, stats: dict) -> KnapsackAllocation:
+        reused: int = self.__valid
+        computed: int = self.__extend(budget)
+
+        # Row j of the longer rows is the same as for the capacity itself,
+        # and so are the decision bits up to j.
+        allocation: list = []
+        j: int = self.capacity
+        for i in range(self.__valid - 1, -1, -1):
+            weight: int = self.weights[i]
+            if self.__bits[i] is None or j < weight:
+                continue
+            k: int = j - weight
+            if self.__bits[i][k >> 3] >> (k & 7) & 1:
+                allocation.append(i)
+                j -= weight
+        value = sum(self.values[idx] for idx in allocation)
+
+        if stats is not None:
+            stats['rows'] = computed
+            stats['reused_rows'] = reused
+            stats['checkpoints'] = len(self.__checkpoints)
+            stats['optimal'] = not budget.exhausted
+            stats['gap'] = linear_relaxation_bound(self.instance) - value if budget.exhausted else 0
+
+        return KnapsackAllocation(allocation, value)
+
+    def solve(
+        self,
+        method: str = 'dynamic_programming',
+        time_limit: float = None,
+        stats: dict = None,
+        callback=None,
+        **options
+    ) -> KnapsackAllocation:
+        """
+        Solves the current instance by one of METHODS, reusing the work of
+        previous solves. Dynamic programming recomputes only the stale rows,
+        and stops after time_limit seconds with the optimum over the items
+        processed so far, which the next solve carries on from. Branch and
+        bound and simulated annealing start from the previous optimum, and
+        any other options are passed on to them.
+
+        The stats record what the solver records, along with the previous
+        optimum's value under 'warm_start' for the warm-started methods, or
+        the number of rows computed and reused for dynamic programming.
+        """
+        if method not in METHODS:
+            raise ValueError(f'method must be one of {METHODS}, not {method!r}')
+
+        if method == 'dynamic_programming':
+            progress: SolverProgress = SolverProgress(callback)
+            with phase(stats, 'solve'):
+                allocation: KnapsackAllocation = self.__dynamic_programming(SolverBudget(time_limit), stats)
+            progress.improved(allocation.value)
+        else:
+            if stats is not None:
+                stats['warm_start'] = sum(self.values[idx] for idx in self.allocation)
+            solver = branch_and_bound_solver if method == 'branch_and_bound' else simulated_annealing_solver
+            warm_start: str = 'incumbent' if method == 'branch_and_bound' else 'initial'
+            options[warm_start] = self.allocation
+            allocation: KnapsackAllocation = solver(
+                self.instance, time_limit=time_limit, stats=stats, callback=callback, **options
+            )
+
+        self.allocation = sorted(allocation.knapsack)
+        return allocation
@@ -1,12 +1,13 @@
-from knapsack import KnapsackInstance, KnapsackAllocation
+from knapsack import KnapsackInstance, KnapsackAllocation, KnapsackItem
+from .budget import SolverBudget
+from .progress import SolverProgress, phase
 from dataclasses import dataclass
-import numpy as np
 import random
+import math
+import time
+import os
 
 
-# Ignore Exp Overflow
-np.seterr(over='ignore')
-
 # TODO: This doesn't work very well, and it isn't very fast.
 # A better neighbourhood is probably in order, and futher
 # tuning of the parameters.
@@ -22,45 +23,180 @@ class SAKnapsack:
     def __str__(self):
         return str(self.allocation) + f', (weight {self.weight}), (value {self.value})'
 
-    def neighbour(self):
+    def propose(self, idx: int) -> tuple:
         """
-        Generates a neighbour by randomly flipping a single bit and adding
-        adding or subtracting the corresponding weight and value from
-        the total. Allocations exceeding the weight capacity are given
-        a negative valuation, such that the default allocation (all
-        zeroes) is better.
+        Evaluates flipping the bit at idx, i.e., including or excluding the
+        item at idx, without copying anything, and returns the move as a
+        (idx, delta_value, delta_weight) triple. Allocations exceeding the
+        weight capacity are given a negative valuation, such that the
+        default allocation (all zeroes) is better. Their value is still
+        preserved, and abs() recovers it when a later move brings the
+        weight back below the capacity.
 
         Example:
-        self:      [1, 0, 0, 1, 0]
-        neighbour: [1, 0, 0, 1, 1]
-                                ^
+        self:       [1, 0, 0, 1, 0]
+        propose(4): [1, 0, 0, 1, 1]
+                                 ^
         """
-
-        # Create a deep copy of the allocation for the new object:
-        _allocation: list = self.allocation[:]
-        _value: int = self.value
-        _weight: int = self.weight
-
-        # Generate randomly an index in the allocation and flip
-        # the bit, i.e., include/exclude the item at that index:
-        ridx: int = random.randint(0, len(_allocation) - 1)
-        _allocation[ridx] = int(not _allocation[ridx])
-
-        # We update the value and weight by setting false bits
-        # to -1 such that it subtracts if the item was excluded:
-        pos_neg: int = 1 if _allocation[ridx] else -1
-        _value = abs(_value) + (pos_neg * self.instance.items[ridx].value)
-        _weight += pos_neg * self.instance.items[ridx].weight
-
-        # We negatively value allocations whose weight exceeds
-        # the knapsack capacity. We still preserve its value,
-        # and use abs(_value) above to update it where one
-        # of its neighbours may reduce the total weight
-        # below the knapsack capacity:
+        item: KnapsackItem = self.instance.items[idx]
+        pos_neg: int = -1 if self.allocation[idx] else 1
+        _value: int = abs(self.value) + pos_neg * item.value
+        _weight: int = self.weight + pos_neg * item.weight
         if _weight > self.instance.capacity:
             _value = -_value
+        return idx, _value - self.value, _weight - self.weight
+
+    def apply(self, move: tuple):
+        """
+        Makes a move returned by propose(), flipping the bit in place.
+        """
+        idx, delta_value, delta_weight = move
+        self.allocation[idx] ^= 1
+        self.value += delta_value
+        self.weight += delta_weight
+
+
+@dataclass
+class SAChain:
+    """
+    Stores the state of one annealing chain between runs, such that a chain
+    can be paused, sent to another process, have its current allocation
+    swapped with another chain, and resumed.
+    """
+    allocation: list  # The current allocation, e.g. [1, 0, 0, 1, 0]
+    value: int  # Negative if the current allocation exceeds the capacity
+    weight: int
+    temperature: float
+    temperature_length: int
+    cooling_ratio: float
+    best_allocation: list
+    best_value: int
+    count_num_non_improve: int = 0
+    moves: int = 0
+    accepted: int = 0  # Moves which changed the current allocation
+    rng_state: tuple = None  # The state of the chain's own random.Random
+
+
+def __new_chain(
+    instance: KnapsackInstance,
+    initial_temperature: float,
+    temperature_length: int,
+    cooling_ratio: float,
+    initial: list = None
+) -> SAChain:
+    """
+    Creates a chain which starts from the empty allocation, or from the
+    item indices in initial, which are also the best allocation so far if
+    they fit in the knapsack.
+    """
+    empty: list = [0] * len(instance.items)
+    if not initial:
+        return SAChain(empty, 0, 0, initial_temperature, temperature_length, cooling_ratio, empty[:], 0)
+
+    allocation: list = empty[:]
+    for idx in initial:
+        allocation[idx] = 1
+    values = instance.values
+    weights = instance.weights
+    value: int = sum(values[idx] for idx in initial)
+    weight: int = sum(weights[idx] for idx in initial)
+    if weight > instance.capacity:
+        return SAChain(allocation, -value, weight, initial_temperature, temperature_length, cooling_ratio, empty, 0)
+    return SAChain(allocation, value, weight, initial_temperature, temperature_length, cooling_ratio, allocation[:], value)
+
+
+def __anneal(
+    instance: KnapsackInstance,
+    chain: SAChain,
+    num_non_improve: int,
+    budget: SolverBudget,
+    rng: random.Random,
+    progress: SolverProgress
+):
+    """
+    Runs the chain until num_non_improve moves in a row have not improved
+    on its best allocation, or until the budget runs out, and reports each
+    new best value to progress.
+    """
+    # Track the current allocation, which is updated in place, and the
+    # best allocation found so far. Copying the best allocation on every
+    # improvement would cost O(n) per move while the chain is climbing, so
+    # instead we keep a journal of the bits flipped since best_allocation
+    # was last brought up to date, and the length of the journal when the
+    # best value was found. Replaying that prefix gives the best allocation.
+    # A resumed chain may have moved away from its best allocation, so the
+    # journal starts with the bits where the two differ.
+    population: range = range(len(instance.items))
+    current_allocation: SAKnapsack = SAKnapsack(instance, chain.allocation, chain.value, chain.weight)
+    best_allocation: list = chain.best_allocation
+    best_value: int = chain.best_value
+    journal: list = [idx for idx in population if current_allocation.allocation[idx] != best_allocation[idx]]
+    best_length: int = 0
+
+    # Random indices are drawn MOVE_BATCH at a time, which is much cheaper
+    # than one randint() call per move:
+    indices: list = []
+    position: int = 0
+
+    # As long as we have improved within the deadline, and we still
+    # have time and moves left in the budget:
+    while chain.count_num_non_improve < num_non_improve and not budget.exhausted:
+        for _ in range(chain.temperature_length):
+            if not budget.step():
+                break
+            chain.moves += 1
+
+            if position == len(indices):
+                indices = rng.choices(population, k=MOVE_BATCH)
+                position = 0
+
+            # Propose flipping a random bit and compare values:
+            move: tuple = current_allocation.propose(indices[position])
+            position += 1
+            delta_value: int = move[1]
+            chain.count_num_non_improve += 1
+
+            # A better allocation instantly becomes the current allocation:
+            if delta_value >= 0:
+                current_allocation.apply(move)
+                journal.append(move[0])
+                chain.accepted += 1
+                # Update best_allocation if it is the best:
+                if current_allocation.value > best_value:
+                    best_value = current_allocation.value
+                    best_length = len(journal)
+                    progress.improved(best_value)
+                    # We have improved, so reset the count:
+                    chain.count_num_non_improve = 0
+
+            # Otherwise, accept a worse allocation with a probability
+            # that shrinks as the temperature drops, and never once the
+            # temperature has cooled all the way to zero:
+            elif chain.temperature > 0 and rng.random() < math.exp(delta_value / chain.temperature):
+                current_allocation.apply(move)
+                journal.append(move[0])
+                chain.accepted += 1
+
+            # Bring best_allocation up to date once the journal is twice as
+            # long as the allocation, and keep only the bits where the current
+            # allocation differs from it, so each move costs O(1) amortised:
+            if len(journal) > 2 * len(population):
+                for idx in journal[:best_length]:
+                    best_allocation[idx] ^= 1
+                journal = [idx for idx in population if current_allocation.allocation[idx] != best_allocation[idx]]
+                best_length = 0
+
+        # After temperature_length iterations, update the temperature:
+        chain.temperature *= chain.cooling_ratio
 
-        return SAKnapsack(self.instance, _allocation, _value, _weight)
+    for idx in journal[:best_length]:
+        best_allocation[idx] ^= 1
+
+    chain.allocation = current_allocation.allocation
+    chain.value = current_allocation.value
+    chain.weight = current_allocation.weight
+    chain.best_allocation = best_allocation
+    chain.best_value = best_value
 
 
 def __simulated_annealing_solver(
@@ -68,62 +204,100 @@ def __simulated_annealing_solver(
         initial_temperature: float,
         temperature_length: int,
         cooling_ratio: float,
-        num_non_improve: int
+        num_non_improve: int,
+        budget: SolverBudget,
+        progress: SolverProgress,
+        stats: dict,
+        initial: list = None
 ):
-    # Track the current temperature and the number of 
-    # non-improved solutions:
-    current_temperature: float = initial_temperature
-    count_num_non_improve: int = 0
+    chain: SAChain = __new_chain(instance, initial_temperature, temperature_length, cooling_ratio, initial)
+    if chain.best_value > 0:
+        progress.improved(chain.best_value)
+    with phase(stats, 'anneal'):
+        __anneal(instance, chain, num_non_improve, budget, random, progress)
 
-    # Track the current allocation and best allocation
-    # found so far:
-    current_allocation: SAKnapsack = SAKnapsack(
-        instance,
-        [0] * len(instance.items),
-        0,
-        0
+    if stats is not None:
+        stats['accepted'] = chain.accepted
+        stats['acceptance_rate'] = chain.accepted / chain.moves if chain.moves else None
+        stats['final_temperature'] = chain.temperature
+        stats['incumbent_updates'] = progress.improvements
+
+    result = [idx for idx, val in enumerate(chain.best_allocation) if val]
+    return KnapsackAllocation(result, chain.best_value)
+
+
+# The instance a parallel annealing worker runs its chains on.
+__WORKER: dict = {}
+
+
+def __init_worker(capacity: int, weights: list, values: list):
+    """
+    Sets up a worker process with the instance, so that each round only
+    sends the chains. The instance is sent as plain lists of weights and
+    values, which pickle far smaller than KnapsackItems.
+    """
+    __WORKER['instance'] = KnapsackInstance(
+        capacity, [KnapsackItem(weight, value) for weight, value in zip(weights, values)]
     )
-    best_allocation: SAKnapsack = current_allocation
 
-    # As long as we have improved within the deadline:
-    while count_num_non_improve < num_non_improve:
-        for _ in range(temperature_length):
-            # Generate a neighbour and compare values:
-            neighbour_allocation: SAKnapsack = current_allocation.neighbour()
-            delta_value: int = neighbour_allocation.value - current_allocation.value
 
-            # A better allocation instantly becomes the current allocation:
-            if delta_value >= 0:
-                current_allocation = neighbour_allocation
-                count_num_non_improve += 1
-                # Update best_allocation if it is the best:
-                if current_allocation.value > best_allocation.value:
-                    best_allocation = current_allocation
-                    # We have improved, so reset the count:
-                    count_num_non_improve = 0
-            
-            # Otherwise, accept a worse allocation with some probability:
-            else:
-                q = random.uniform(0, 1)
-                p = np.exp(-delta_value / current_temperature)
-                if q < p:
-                    current_allocation = neighbour_allocation
-                count_num_non_improve += 1
-        
-        # After temperature_length iterations, update the temperature:
-        current_temperature *= cooling_ratio
+def __run_chain(
+    chain: SAChain,
+    num_non_improve: int,
+    deadline: float,
+    max_moves: int
+) -> SAChain:
+    """
+    Runs one chain in a worker process, on the instance set up by
+    __init_worker(). The deadline is a time.time() timestamp rather than a
+    time limit, since a chain may wait in the queue for a free worker.
+    """
+    rng: random.Random = random.Random()
+    rng.setstate(chain.rng_state)
+    time_limit: float = None if deadline is None else max(0.0, deadline - time.time())
+    __anneal(
+        __WORKER['instance'], chain, num_non_improve, SolverBudget(time_limit, max_moves), rng, SolverProgress()
+    )
+    chain.rng_state = rng.getstate()
+    return chain
 
-    result = [idx for idx, val in enumerate(best_allocation.allocation) if val]
-    return KnapsackAllocation(result, best_allocation.value)
+
+def __exchange(chains: list, rng: random.Random) -> int:
+    """
+    Parallel tempering: chains are ordered by temperature, and neighbouring
+    chains swap their current allocations with probability
+    min(1, exp((v_j - v_i) * (1 / T_i - 1 / T_j))), which always hands a
+    better allocation to the colder chain, and sometimes a worse one.
+    Returns the number of swaps made.
+    """
+    chains = sorted(chains, key=lambda chain: chain.temperature)
+    swaps: int = 0
+    for colder, hotter in zip(chains, chains[1:]):
+        exponent: float = (hotter.value - colder.value) * \
+            (1 / max(colder.temperature, 1e-300) - 1 / max(hotter.temperature, 1e-300))
+        if exponent >= 0 or rng.random() < math.exp(exponent):
+            colder.allocation, hotter.allocation = hotter.allocation, colder.allocation
+            colder.value, hotter.value = hotter.value, colder.value
+            colder.weight, hotter.weight = hotter.weight, colder.weight
+            swaps += 1
+    return swaps
 
 
 INITIAL_TEMPERATURE: float = 10.0
 TEMPERATURE_LENGTH: int = 1
 COOLING_RATIO = 0.999
 NUM_NON_IMPROVE = 100000
+MOVE_BATCH: int = 1024  # Random indices drawn at once by each chain
 
 
-def simulated_annealing_solver(instance: KnapsackInstance):
+def simulated_annealing_solver(
+    instance: KnapsackInstance,
+    time_limit: float = None,
+    max_iterations: int = None,
+    stats: dict = None,
+    callback=None,
+    initial: list = None
+):
     """
     We start from an empty allocation (zero weight and value) and randomly
     generate neighbours to converge on a good, hopefully near-optimal, 
@@ -137,11 +311,155 @@ def simulated_annealing_solver(instance: KnapsackInstance):
     as the annealing process goes on. Accepting worse solutions allows
     us to escape local optima. We record the best solution found
     throughout annealing and return it at the end.
+
+    Annealing also stops after time_limit seconds or max_iterations moves,
+    returning the best solution so far. The result is never proven optimal,
+    which is recorded under stats['optimal'] if a stats dictionary is passed.
+    The stats also record the number of moves accepted, the acceptance rate,
+    the final temperature, the number of times the best value improved and
+    the time spent annealing, and callback(value, elapsed) is called with
+    each new best value.
+
+    A list of item indices may be passed as initial to warm-start from a
+    known allocation, e.g. the optimum before the instance was edited,
+    instead of the empty one.
     """
-    return __simulated_annealing_solver(
+    budget: SolverBudget = SolverBudget(time_limit, max_iterations)
+    allocation: KnapsackAllocation = __simulated_annealing_solver(
         instance,
         INITIAL_TEMPERATURE,
         TEMPERATURE_LENGTH,
         COOLING_RATIO,
-        NUM_NON_IMPROVE
+        NUM_NON_IMPROVE,
+        budget,
+        SolverProgress(callback),
+        stats,
+        initial
     )
+
+    if stats is not None:
+        stats['optimal'] = False
+        stats['gap'] = None
+        stats['iterations'] = budget.iterations
+
+    return allocation
+
+
+def parallel_simulated_annealing_solver(
+    instance: KnapsackInstance,
+    num_chains: int = None,
+    workers: int = None,
+    seeds: list = None,
+    schedules: list = None,
+    exchange_interval: int = None,
+    time_limit: float = None,
+    max_iterations: int = None,
+    stats: dict = None,
+    callback=None
+):
+    """
+    Runs num_chains independent annealing chains, one per CPU core by
+    default, in a pool of worker processes, and returns the best allocation
+    found by any of them. Each chain has its own seed, which defaults to a
+    random draw, and its own schedule, a tuple of (initial_temperature,
+    temperature_length, cooling_ratio), which defaults to the module
+    constants.
+
+    If exchange_interval is set, the chains pause every exchange_interval
+    moves and neighbouring chains by temperature may swap their current
+    allocations (parallel tempering), so that good allocations found by hot
+    chains reach cold chains, which refine them.
+
+    Each chain stops after NUM_NON_IMPROVE moves without improvement, after
+    max_iterations moves, or once time_limit seconds have passed in total.
+    The stats record the moves made and accepted by all chains, the moves
+    per second, the number of swaps and the final temperature of each
+    chain. The chains run in other processes, so callback(value, elapsed)
+    is called between rounds, whenever the best value of any chain has
+    improved.
+    """
+    workers = workers or os.cpu_count() or 1
+    num_chains = num_chains or workers
+    seeds = seeds if seeds is not None else [random.getrandbits(64) for _ in range(num_chains)]
+    schedules = schedules or [(INITIAL_TEMPERATURE, TEMPERATURE_LENGTH, COOLING_RATIO)] * num_chains
+    if len(seeds) != num_chains or len(schedules) != num_chains:
+        raise ValueError('seeds and schedules must have one entry per chain')
+
+    chains: list = []
+    for seed, schedule in zip(seeds, schedules):
+        chain: SAChain = __new_chain(instance, *schedule)
+        chain.rng_state = random.Random(seed).getstate()
+        chains.append(chain)
+
+    weights: list = [item.weight for item in instance.items]
+    values: list = [item.value for item in instance.items]
+    exchange_rng: random.Random = random.Random(seeds[0])
+    swaps: int = 0
+    progress: SolverProgress = SolverProgress(callback)
+    best_value: int = 0
+    start: float = time.perf_counter()
+    # Chains queued behind others share the same wall-clock deadline.
+    deadline: float = None if time_limit is None else time.time() + time_limit
+
+    def finished(chain: SAChain) -> bool:
+        return chain.count_num_non_improve >= NUM_NON_IMPROVE \
+            or (max_iterations is not None and chain.moves >= max_iterations) \
+            or (time_limit is not None and time.perf_counter() - start >= time_limit)
+
+    # The process pool is only imported by the parallel solver.
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=__init_worker,
+        initargs=(instance.capacity, weights, values)
+    ) as executor:
+        active: list = list(range(num_chains))
+        while active:
+            # Each round runs every active chain until its next exchange,
+            # or to completion without parallel tempering.
+            moves: list = []
+            for idx in active:
+                limit: int = max_iterations - chains[idx].moves if max_iterations is not None else None
+                if exchange_interval is not None:
+                    limit = exchange_interval if limit is None else min(limit, exchange_interval)
+                moves.append(limit)
+
+            results = executor.map(
+                __run_chain,
+                [chains[idx] for idx in active],
+                [NUM_NON_IMPROVE] * len(active),
+                [deadline] * len(active),
+                moves
+            )
+            for idx, chain in zip(active, results):
+                chains[idx] = chain
+
+            if max(chain.best_value for chain in chains) > best_value:
+                best_value = max(chain.best_value for chain in chains)
+                progress.improved(best_value)
+
+            if exchange_interval is None:
+                break
+
+            active = [idx for idx in active if not finished(chains[idx])]
+            swaps += __exchange([chains[idx] for idx in active], exchange_rng)
+
+    elapsed: float = time.perf_counter() - start
+    best: SAChain = max(chains, key=lambda chain: chain.best_value)
+
+    if stats is not None:
+        total_moves: int = sum(chain.moves for chain in chains)
+        stats['optimal'] = False
+        stats['gap'] = None
+        stats['chains'] = num_chains
+        total_accepted: int = sum(chain.accepted for chain in chains)
+        stats['iterations'] = total_moves
+        stats['accepted'] = total_accepted
+        stats['acceptance_rate'] = total_accepted / total_moves if total_moves else None
+        stats['moves_per_second'] = total_moves / elapsed if elapsed > 0 else None
+        stats['swaps'] = swaps
+        stats['final_temperatures'] = [chain.temperature for chain in chains]
+        stats['timings'] = {'anneal': elapsed}
+
+    result = [idx for idx, val in enumerate(best.best_allocation) if val]
+    return KnapsackAllocation(result, best.best_value)